@@ -24,6 +24,69 @@ except ImportError:
     raise ImportError("You must install NetworkX:\
     (http://networkx.lanl.gov/) for SE simulation")
 
+#####################################################################
+# Given a graph and the number of connections to be made, returns   #
+# the nodes to which a new node attaches (based on connection       #
+# density). Please note: the following function was taken from      #
+# Steve Mooney's Obesagent ASFNetwork.py program                    #
+#####################################################################
+def ASFNetwork_attachTargets(G, nConnections):
+    candidate_nodes = list(G.nodes())
+
+    # Reorder candidates to ensure randomness
+    random.shuffle(candidate_nodes)
+    target_nodes = []
+
+    # Double edge count to get per-node edge count.
+    edge_count = len(G.edges(candidate_nodes)) * 2
+
+    # Pick a random number
+    rand = random.random()
+    p_sum = 0.0
+
+    # To add edges per the B-A algorithm, we compute probabilities
+    # for each node multiplying by nConnections, then partition the
+    # probability space per the probabilities.  Every time we find a
+    # match, we add one to the random number.  So, for example, 
+    # suppose we have four nodes with p1=0.5, p2=0.75, p3=0.5 and 
+    # p4=0.25.  If our random number is 0.38, we'll first pick node 1, 
+    # since 0 < .38 < .5, then skip node 2, since 1.38 > 1.25 
+    # (=0.5+0.75), then pick node 3, since 1.25 < 1.38 < 1.75, then 
+    # skip node 4, since 2.38 > 2.0
+
+    # Note that because we randomized candidates above, the selection is
+    # truly random.
+
+    for candidate_node in candidate_nodes:
+        p_edge = nConnections * 1.0 * len(G.edges(candidate_node))/edge_count
+        low = p_sum
+        high = p_sum + p_edge
+        test = rand + len(target_nodes)
+        if (test > low and test <= high):
+            target_nodes.append(candidate_node)
+        p_sum += p_edge
+    return target_nodes
+
+#####################################################################
+# Given a nodeCount, the number of baseline nodes (m_0) and number  #
+# of edges added at each step (m), returns an ASF graph (graph      #
+# only: used as is by batched runs, which do not need the agents)   #
+#####################################################################
+def ASFNetwork_createGraph(nodeCount, m_0 = 4, m = 4):
+    G = nx.Graph()
+    G.name = "barabasi_albert_graph(%s,%s)"%(m, nodeCount)
+
+    G.add_nodes_from(range(0, m_0))
+    for i in range(0, m_0):
+        for j in range(i, m_0):
+            G.add_edge(i,j)
+
+    for i in range(m_0, nodeCount):
+        G.add_node(i)
+        G.add_edges_from((i, target)
+            for target in ASFNetwork_attachTargets(G, m))
+    return G
+
 class ASFNetwork:
     #################################################################
     # Given a nodeCount for the number of agents to be simulated,   #
@@ -54,27 +117,9 @@ class ASFNetwork:
     # Creates the agents present in the simulation (ASF graph)      #
     #################################################################
     def ASFNetwork_createAgents(self):
-        # Creates baseline nodes (from m_0 specified)
-        totalConnect = self.m_0
-
-        self.G = nx.Graph()
+        self.G = ASFNetwork_createGraph(self.nodeCount, self.m_0, self.m)
         self.networkBase.NetworkBase_setGraph(self.G)
-        
-        self.G.name = "barabasi_albert_graph(%s,%s)"\
-            %(self.m,self.nodeCount)
 
-        for i in range(0, totalConnect):
-            curAgent = self.agentFactory.AgentFactory_createAgent(self, i)
-            self.Agents[i] = curAgent
-            self.G.add_node(curAgent.agentID)
-        
-        for i in range(0, totalConnect):
-            for j in range(i, totalConnect):
-                self.G.add_edge(i,j)
-    
-        # Creates remainder of nodes (assigning them to agents)
-        for i in range(totalConnect, self.nodeCount):
+        for i in range(0, self.nodeCount):
             curAgent = self.agentFactory.AgentFactory_createAgent(self, i)
             self.Agents[i] = curAgent
-            self.G.add_node(curAgent.agentID)
-            curAgent.Agent_preferentiallyAttach(self, self.m)
\ No newline at end of file
@@ -18,6 +18,11 @@ from operator import itemgetter
 from collections import OrderedDict
 
 from Dog import Dog
+from Scheduler import Scheduler_hazard
+
+SCALE = .25
+DOG_IMPACT = .0050
+NETWORK_IMPACT = .0005
 
 try:
     import networkx as nx
@@ -30,16 +35,18 @@ except ImportError:
 # the constituent people in a population                            #
 #####################################################################
 class Agent:
-    def __init__(self, agentID, income, num_residents, num_dogs, 
-        attitude, p_acquire, p_release, p_sterilization, 
-        education_level, network):
+    # fixed attribute layout (no per-agent __dict__)
+    __slots__ = ('agentID', 'num_residents', 'num_dogs', 'dogs', 
+        'num_stray_dogs', 'has_stray_dog', 'network', 'attitude', 
+        'normal_attitude', 'p_acquire', 'p_release', 'p_sterilization', 
+        'education_level', 'norm_education_level')
+
+    def __init__(self, agentID, num_residents, num_dogs, attitude, 
+        p_acquire, p_release, p_sterilization, education_level, network):
         # --------------------- static variables ------------------- #
         # arbitrary value for identification
         self.agentID = agentID
 
-        # income of household
-        self.income = income
-
         # number of people staying in house -- maximum around 4
         self.num_residents = num_residents
 
@@ -57,13 +64,6 @@ class Agent:
         self.network = network
         
         # ------------------- changing variables ------------------- #
-        # whether or not the household has children (i.e. 
-        # > 2 people, assuming no grandparents)
-        self.has_children = (self.num_residents > 2)
-
-        # list of associated friends in the network
-        self.friends = []
-
         # un-normalized attitude value of household towards dogs
         self.attitude = attitude
     
@@ -90,6 +90,14 @@ class Agent:
         for i in range(0, num_dogs):
             self.Agent_new_dog()
             
+    #################################################################
+    # Whether or not the household has children (i.e. > 2 people,   #
+    # assuming no grandparents)                                     #
+    #################################################################
+    @property
+    def has_children(self):
+        return (self.num_residents > 2)
+
     #################################################################
     # Provides an output string for printing out agents             #
     #################################################################
@@ -103,80 +111,36 @@ class Agent:
         return 1/(1 + np.exp(-(val - 5)))
 
     #################################################################
-    # Used for initialization of ASF network: determines to which   #
-    # nodes a given agent will attach (based on connection density).#
-    # Please note: the following function was taken from Steve      #
-    # Mooney's Obesagent ASFNetwork.py program                      #
+    # Given the time elapsed (in time steps) since the last update, #
+    # updates the agent: attitude and education change at their     #
+    # yearly rates, and the yearly probabilities of acquiring,      #
+    # sterilizing and releasing dogs apply over the time elapsed    #
     #################################################################
-    def Agent_preferentiallyAttach(self, network, nConnections):
-        candidate_nodes = network.G.nodes()
-        
-        # Reorder candidates to ensure randomness
-        random.shuffle(candidate_nodes)
-        target_nodes = []
-
-        # Double edge count to get per-node edge count.
-        edge_count = len(network.G.edges(candidate_nodes)) * 2
-
-        # Pick a random number
-        rand = random.random()
-        p_sum = 0.0
-        
-        # To add edges per the B-A algorithm, we compute probabilities
-        # for each node multiplying by nConnections, then partition the
-        # probability space per the probabilities.  Every time we find a
-        # match, we add one to the random number.  So, for example, 
-        # suppose we have four nodes with p1=0.5, p2=0.75, p3=0.5 and 
-        # p4=0.25.  If our random number is 0.38, we'll first pick node 1, 
-        # since 0 < .38 < .5, then skip node 2, since 1.38 > 1.25 
-        # (=0.5+0.75), then pick node 3, since 1.25 < 1.38 < 1.75, then 
-        # skip node 4, since 2.38 > 2.0
-
-        # Note that because we randomized candidates above, the selection is
-        # truly random.
-
-        for i in range(len(candidate_nodes)):
-            candidate_node = candidate_nodes[i]
-            candidate_edges = network.G.edges(candidate_node)
-            p_edge = nConnections * 1.0 * len(candidate_edges)/edge_count
-            low = p_sum
-            high = p_sum + p_edge
-            test = rand + len(target_nodes)
-            if (test > low and test <= high):
-                target_nodes.append(candidate_node)
-            p_sum += p_edge
-
-        node_list = [self.agentID] * len(target_nodes)
-        edges_to_add = zip(node_list, target_nodes)
-        network.networkBase.NetworkBase_addEdges(edges_to_add)
-
-    def Agent_updateAgent(self):
-        self.Agent_update_attitude()
+    def Agent_updateAgent(self, elapsed=1):
+        self.Agent_update_attitude(elapsed)
         self.Agent_update_probacquire()
         self.Agent_update_probrelease()
-        self.Agent_update_education()
+        self.Agent_update_education(elapsed)
         self.Agent_update_steralize()
 
-        self.Agent_acquire_dog()
+        self.Agent_acquire_dog(elapsed)
         for dog in self.dogs:
-            self.Agent_steralize_dog(dog)
-            self.Agent_release_dog(dog)
+            self.Agent_steralize_dog(dog, elapsed)
+            self.Agent_release_dog(dog, elapsed)
         self.Agent_update_stray()
 
     def Agent_new_dog(self):
-        dog = Dog(self, self.network, self.agentID)
+        dog = self.network.networkBase.NetworkBase_newDog(
+            self, self.network, self.agentID)
         self.dogs.append(dog)
         self.num_dogs += 1
 
-        self.network.networkBase.dogs.append(dog)
-        self.network.networkBase.num_dogs += 1
-
-    def Agent_acquire_dog(self):
-        if random.random() < self.p_acquire:
+    def Agent_acquire_dog(self, elapsed=1):
+        if random.random() < Scheduler_hazard(self.p_acquire, elapsed):
             self.Agent_new_dog()
 
-    def Agent_release_dog(self, dog):
-        if random.random() < self.p_release:
+    def Agent_release_dog(self, dog, elapsed=1):
+        if random.random() < Scheduler_hazard(self.p_release, elapsed):
             self.dogs.remove(dog)
             self.num_dogs -= 1
             dog.owner = None
@@ -184,19 +148,19 @@ class Agent:
             self.network.networkBase.NetworkBase_addStray(
                 self.agentID, dog)
 
-    def Agent_steralize_dog(self, dog):
-        if random.random() < self.p_sterilization:
+    def Agent_steralize_dog(self, dog, elapsed=1):
+        if random.random() < Scheduler_hazard(self.p_sterilization, 
+            elapsed):
             dog.is_steralized = True
         
-    def Agent_update_attitude(self):
-        SCALE = .25
+    def Agent_update_attitude(self, elapsed=1):
         delta_attitude = SCALE * self.norm_education_level/(1 + 
             self.num_stray_dogs)
         delta_attitude *= SCALE * self.network.networkBase.\
             NetworkBase_mean_attitude(self)
         delta_attitude -= SCALE
 
-        self.attitude += delta_attitude
+        self.attitude += delta_attitude * elapsed
         self.normal_attitude = self.Agent_normalize(self.attitude)
 
     def Agent_update_probacquire(self):
@@ -205,16 +169,13 @@ class Agent:
     def Agent_update_probrelease(self):
         self.p_release = np.exp(-self.normal_attitude)/2
 
-    def Agent_update_education(self):
-        DOG_IMPACT = .0050
-        NETWORK_IMPACT = .0005
-
+    def Agent_update_education(self, elapsed=1):
         delta_education = DOG_IMPACT * self.network.networkBase.\
             NetworkBase_mean_education(self)
         delta_education += NETWORK_IMPACT * self.network.networkBase.\
             dog_education * (1 - (self.norm_education_level - .5) ** 2)
 
-        self.education_level += delta_education
+        self.education_level += delta_education * elapsed
         print(self.education_level)
         self.norm_education_level = self.Agent_normalize(self.education_level)
 
@@ -15,6 +15,12 @@ import matplotlib.pyplot as plt
 from operator import itemgetter
 from Agent import Agent 
 
+MEAN_RES = 4
+VAR_RES = 1
+
+MEAN_DOG = 1
+VAR_DOG = 1
+
 try:
     import networkx as nx
 except ImportError: 
@@ -36,17 +42,6 @@ def AgentFactory_invnormalize(val):
 
 class AgentFactory(object):
     def AgentFactory_createAgent(network, agentID):
-        MEAN_INCOME = 50500
-        VAR_INCOME = 10000
-
-        MEAN_RES = 4
-        VAR_RES = 1
-
-        MEAN_DOG = 1
-        VAR_DOG = 1
-
-        income = AgentFactory_normint(MEAN_INCOME, VAR_INCOME)
-
         num_residents = AgentFactory_normint(MEAN_RES, VAR_RES)
         num_dogs = AgentFactory_normint(MEAN_DOG, VAR_DOG)
 
@@ -60,6 +55,6 @@ class AgentFactory(object):
         p_release = np.exp(-norm_attitude)
         p_sterilization = norm_education_level ** 2
 
-        return Agent(agentID, income, num_residents, num_dogs, 
-            attitude, p_acquire, p_release, p_sterilization, 
-            education_level, network)
\ No newline at end of file
+        return Agent(agentID, num_residents, num_dogs, attitude, 
+            p_acquire, p_release, p_sterilization, education_level, 
+            network)
\ No newline at end of file
@@ -0,0 +1,367 @@
+"""
+author = Yash Patel and DoWon Kim
+name = BatchNetwork.py
+description: Contains all the methods pertinent to advancing several
+independent replicates of the simulation on the same graph at once,
+with the household state held in (replicates x agents) arrays
+"""
+
+import numpy as np
+
+from Agent import SCALE, DOG_IMPACT, NETWORK_IMPACT
+from AgentFactory import MEAN_DOG, VAR_DOG
+from Dog import MIN_GESTATION
+from Scheduler import Scheduler_hazard
+from TwoHopIndex import TwoHopIndex, TwoHopIndex_adjacency, \
+    TWO_HOP_BUDGET, TWO_HOP_DEGREE_CAP
+
+class BatchNetwork:
+    #################################################################
+    # Given the graph G shared by all replicates, the simulation    #
+    # time span, the number of replicates R and a seed, initializes #
+    # R independent populations. Each replicate draws from its own  #
+    # random stream (spawned from the seed) so results are the same #
+    # as running the replicates one after the other                 #
+    #################################################################
+    def __init__(self, G, timeSpan, numReplicates, seed=None):
+        self.timeSpan = timeSpan
+        self.numReplicates = numReplicates
+        self.numAgents = G.number_of_nodes()
+
+        streams = np.random.SeedSequence(seed).spawn(numReplicates)
+        self.rngs = [np.random.default_rng(s) for s in streams]
+
+        self.dog_education = 0
+
+        # age past which dogs die (see BatchNetwork_setLifespan)
+        self.lifespan = None
+
+        self.BatchNetwork_setupAdjacency(G)
+        self.BatchNetwork_createAgents()
+
+    #################################################################
+    # Builds the (symmetric) CSR adjacency matrix of G along with   #
+    # the degree of each agent, used for moving strays and (unless  #
+    # a two-hop index is set up) for all neighbor averages          #
+    #################################################################
+    def BatchNetwork_setupAdjacency(self, G):
+        self.A = TwoHopIndex_adjacency(G)
+        self.degree = np.diff(self.A.indptr)
+
+        self.influence = self.A
+        self.influence_count = self.degree
+
+    #################################################################
+    # Given a memory budget and degree cap (see TwoHopIndex), makes #
+    # neighbor averages run over the two-hop social network of each #
+    # agent instead of its direct neighbors                         #
+    #################################################################
+    def BatchNetwork_setupTwoHop(self, memoryBudget=TWO_HOP_BUDGET,
+        degreeCap=TWO_HOP_DEGREE_CAP):
+        self.twoHop = TwoHopIndex(self.A, memoryBudget, degreeCap)
+        self.influence = self.twoHop.M
+        self.influence_count = self.twoHop.counts
+
+    #################################################################
+    # Given a lifespan (in time steps, None for dogs that never     #
+    # die), sets it as NetworkBase_setLifespan does                 #
+    #################################################################
+    def BatchNetwork_setLifespan(self, lifespan):
+        self.lifespan = lifespan
+
+    #################################################################
+    # Draws the initial households for every replicate following    #
+    # the same distributions as AgentFactory, and creates the dogs  #
+    # that they own                                                 #
+    #################################################################
+    def BatchNetwork_createAgents(self):
+        R, N = self.numReplicates, self.numAgents
+
+        norm_attitude = self.BatchNetwork_uniformAgents()
+        norm_education_level = self.BatchNetwork_uniformAgents()
+        num_dogs = np.stack([np.maximum(np.round(
+            rng.normal(MEAN_DOG, VAR_DOG, N)), 0) for rng in self.rngs])
+
+        self.attitude = self.BatchNetwork_invnormalize(norm_attitude)
+        self.normal_attitude = norm_attitude
+        self.education_level = \
+            self.BatchNetwork_invnormalize(norm_education_level)
+        self.norm_education_level = norm_education_level
+
+        self.num_dogs = num_dogs.astype(int)
+        self.num_stray_dogs = np.zeros((R, N), dtype=int)
+
+        self.p_acquire = norm_attitude/(1 + self.num_dogs)
+        self.p_release = np.exp(-norm_attitude)
+        self.p_sterilization = norm_education_level ** 2
+
+        # dogs are stored as flat arrays over all replicates, kept
+        # sorted by replicate so each stream draws a contiguous block
+        self.dogs = {
+            'rep': np.zeros(0, dtype=int),
+            'loc': np.zeros(0, dtype=int),
+            'owned': np.zeros(0, dtype=bool),
+            'is_steralized': np.zeros(0, dtype=bool),
+            'prob_rand_reproduce': np.zeros(0),
+            'prob_reproduce': np.zeros(0),
+            'last_birth': np.zeros(0),
+            'age': np.zeros(0)
+        }
+        rep, loc = np.nonzero(self.num_dogs)
+        counts = self.num_dogs[rep, loc]
+        self.BatchNetwork_addDogs(np.repeat(rep, counts),
+            np.repeat(loc, counts), True)
+
+    def BatchNetwork_normalize(self, val):
+        return 1/(1 + np.exp(-(val - 5)))
+
+    def BatchNetwork_invnormalize(self, val):
+        return (5 - np.log((1/val) - 1))
+
+    #################################################################
+    # Returns an (R, N) array of uniform draws, row r coming from   #
+    # the random stream of replicate r                              #
+    #################################################################
+    def BatchNetwork_uniformAgents(self):
+        return np.stack([rng.random(self.numAgents) for rng in self.rngs])
+
+    #################################################################
+    # Returns one uniform draw per dog, each taken from the random  #
+    # stream of the replicate the dog belongs to                    #
+    #################################################################
+    def BatchNetwork_uniformDogs(self):
+        counts = np.bincount(self.dogs['rep'],
+            minlength=self.numReplicates)
+        return np.concatenate([self.rngs[r].random(counts[r])
+            for r in range(self.numReplicates)])
+
+    #################################################################
+    # Given the replicate and location of each new dog, and whether #
+    # they are owned (True) or strays (False), appends them to the  #
+    # dog arrays, restoring the ordering by replicate               #
+    #################################################################
+    def BatchNetwork_addDogs(self, rep, loc, owned):
+        if len(rep) == 0:
+            return
+
+        # mirrors Dog.__init__, which draws prob_rand_reproduce and
+        # immediately pushes it through Dog_update_reproduce
+        order = np.argsort(rep, kind='stable')
+        rep, loc = rep[order], loc[order]
+        counts = np.bincount(rep, minlength=self.numReplicates)
+        first = np.concatenate([self.rngs[r].random(counts[r])
+            for r in range(self.numReplicates)])
+        second = np.concatenate([self.rngs[r].random(counts[r])
+            for r in range(self.numReplicates)])
+
+        new = {
+            'rep': rep,
+            'loc': loc,
+            'owned': np.full(len(rep), owned, dtype=bool),
+            'is_steralized': np.zeros(len(rep), dtype=bool),
+            'prob_rand_reproduce': first + (1 - first) * second,
+            'prob_reproduce': np.zeros(len(rep)),
+            'last_birth': np.full(len(rep), np.inf),
+            'age': np.zeros(len(rep))
+        }
+        for key in self.dogs:
+            self.dogs[key] = np.concatenate((self.dogs[key], new[key]))
+
+        order = np.argsort(self.dogs['rep'], kind='stable')
+        for key in self.dogs:
+            self.dogs[key] = self.dogs[key][order]
+
+    #################################################################
+    # Given an (R, N) array of agent values, returns the mean value #
+    # over each agent's neighbors in every replicate, using a single#
+    # sparse product for all replicates. Isolated agents get 0      #
+    #################################################################
+    def BatchNetwork_neighborMean(self, values):
+        totals = self.influence.dot(values.T).T
+        return totals/np.maximum(self.influence_count, 1)
+
+    #################################################################
+    # Advances every replicate by one time step, in the same order  #
+    # as NetworkBase_timeStep. Agents are updated synchronously, so #
+    # neighbor averages use the values from the start of the step   #
+    #################################################################
+    def BatchNetwork_timeStep(self, time):
+        self.BatchNetwork_updateAgents()
+        self.BatchNetwork_reproduce()
+        self.BatchNetwork_spreadStray()
+        self.BatchNetwork_updateEducation(time)
+        self.BatchNetwork_ageDogs()
+
+    #################################################################
+    # Returns the phases of a time step by name, each taking the    #
+    # current time and the time elapsed since its last run (both    #
+    # in years, as NetworkBase_getPhases)                           #
+    #################################################################
+    def BatchNetwork_getPhases(self):
+        return {
+            'agents': lambda time, elapsed: 
+                self.BatchNetwork_updateAgents(elapsed),
+            'reproduce': lambda time, elapsed: 
+                self.BatchNetwork_reproduce(elapsed),
+            'strays': lambda time, elapsed: 
+                self.BatchNetwork_spreadStray(),
+            'education': lambda time, elapsed: 
+                self.BatchNetwork_updateEducation(time, elapsed),
+            'aging': lambda time, elapsed: 
+                self.BatchNetwork_ageDogs(elapsed)
+        }
+
+    def BatchNetwork_updateAgents(self, elapsed=1):
+        mean_attitude = self.BatchNetwork_neighborMean(self.attitude)
+        mean_education = \
+            self.BatchNetwork_neighborMean(self.education_level)
+
+        delta_attitude = SCALE * self.norm_education_level/(1 +
+            self.num_stray_dogs)
+        delta_attitude *= SCALE * mean_attitude
+        delta_attitude -= SCALE
+        self.attitude = self.attitude + delta_attitude * elapsed
+        self.normal_attitude = self.BatchNetwork_normalize(self.attitude)
+
+        self.p_acquire = self.normal_attitude/(1 + self.num_dogs)
+        self.p_release = np.exp(-self.normal_attitude)/2
+
+        delta_education = DOG_IMPACT * mean_education
+        delta_education += NETWORK_IMPACT * self.dog_education * \
+            (1 - (self.norm_education_level - .5) ** 2)
+        self.education_level = self.education_level + \
+            delta_education * elapsed
+        self.norm_education_level = \
+            self.BatchNetwork_normalize(self.education_level)
+
+        self.p_sterilization = self.norm_education_level ** 2
+
+        # acquiring dogs
+        acquire = self.BatchNetwork_uniformAgents() < \
+            Scheduler_hazard(self.p_acquire, elapsed)
+        rep, loc = np.nonzero(acquire)
+        self.BatchNetwork_addDogs(rep, loc, True)
+        self.num_dogs += acquire
+
+        # sterilizing and releasing owned dogs
+        dogs = self.dogs
+        rep, loc = dogs['rep'], dogs['loc']
+        steralize = self.BatchNetwork_uniformDogs() < \
+            Scheduler_hazard(self.p_sterilization[rep, loc], elapsed)
+        release = self.BatchNetwork_uniformDogs() < \
+            Scheduler_hazard(self.p_release[rep, loc], elapsed)
+        dogs['is_steralized'] |= dogs['owned'] & steralize
+
+        release &= dogs['owned']
+        dogs['owned'] &= ~release
+        np.subtract.at(self.num_dogs, (rep[release], loc[release]), 1)
+
+        self.BatchNetwork_updateStray()
+
+    def BatchNetwork_updateStray(self):
+        stray = ~self.dogs['owned']
+        N = self.numAgents
+        flat = self.dogs['rep'][stray] * N + self.dogs['loc'][stray]
+        self.num_stray_dogs = np.bincount(flat,
+            minlength=self.numReplicates * N).reshape(-1, N)
+
+    #################################################################
+    # Vectorized version of Dog_reproduce over all dogs of every    #
+    # replicate: owned newborns go to the owner, stray newborns     #
+    # stay at the location of their parent                          #
+    #################################################################
+    def BatchNetwork_reproduce(self, elapsed=1):
+        dogs = self.dogs
+        rand = self.BatchNetwork_uniformDogs()
+        rand_update = self.BatchNetwork_uniformDogs()
+
+        fertile = ~dogs['is_steralized']
+        dogs['last_birth'][fertile] += elapsed
+
+        update = fertile & (dogs['last_birth'] > MIN_GESTATION)
+        prob_rand = dogs['prob_rand_reproduce']
+        prob_rand[update] += (1 - prob_rand[update]) * \
+            Scheduler_hazard(rand_update[update], elapsed)
+
+        el_factor = np.where(dogs['owned'],
+            self.norm_education_level[dogs['rep'], dogs['loc']], 1)
+        dogs['prob_reproduce'][update] = 1/(1 + 10 * el_factor[update] *
+            np.exp(-prob_rand[update]/2))
+
+        born = fertile & (rand <
+            Scheduler_hazard(dogs['prob_reproduce'], elapsed))
+        dogs['prob_rand_reproduce'][born] = 0
+        dogs['prob_reproduce'][born] = 0
+        dogs['last_birth'][born] = 0
+
+        rep, loc = dogs['rep'][born], dogs['loc'][born]
+        owned = dogs['owned'][born]
+        np.add.at(self.num_dogs, (rep[owned], loc[owned]), 1)
+        self.BatchNetwork_addDogs(rep[owned], loc[owned], True)
+        self.BatchNetwork_addDogs(rep[~owned], loc[~owned], False)
+
+    #################################################################
+    # Moves every stray of every replicate to a uniformly chosen    #
+    # neighbor of its current location (strays at isolated agents   #
+    # stay where they are)                                          #
+    #################################################################
+    def BatchNetwork_spreadStray(self):
+        dogs = self.dogs
+        rand = self.BatchNetwork_uniformDogs()
+
+        stray = ~dogs['owned']
+        loc = dogs['loc'][stray]
+        degree = self.degree[loc]
+        can_move = degree > 0
+
+        choice = self.A.indptr[loc] + (degree * rand[stray]).astype(int)
+        loc[can_move] = self.A.indices[choice[can_move]]
+        dogs['loc'][stray] = loc
+
+    #################################################################
+    # Ages every dog of every replicate, removing those past the    #
+    # lifespan if one was set (as NetworkBase_ageDogs)              #
+    #################################################################
+    def BatchNetwork_ageDogs(self, elapsed=1):
+        if self.lifespan is None:
+            return
+
+        dogs = self.dogs
+        dogs['age'] += elapsed
+        dead = dogs['age'] > self.lifespan
+        owned = dead & dogs['owned']
+        np.subtract.at(self.num_dogs, (dogs['rep'][owned], 
+            dogs['loc'][owned]), 1)
+        for key in dogs:
+            dogs[key] = dogs[key][~dead]
+
+    def BatchNetwork_updateEducation(self, time, elapsed=1):
+        if time < self.timeSpan/2:
+            return
+        self.dog_education += 2/self.timeSpan * elapsed
+
+    #################################################################
+    # Returns the population aggregates of NetworkBase_getAggregates#
+    # as arrays with one entry per replicate                        #
+    #################################################################
+    def BatchNetwork_getAggregates(self):
+        strays = np.bincount(self.dogs['rep'][~self.dogs['owned']],
+            minlength=self.numReplicates)
+        return (strays, self.normal_attitude.mean(axis=1),
+            self.norm_education_level.mean(axis=1))
+
+    #################################################################
+    # Given the current time and the results file, appends the rows #
+    # (one per replicate and agent) matching the columns written by #
+    # DogModel_writeSimulationData with a leading replicate column  #
+    #################################################################
+    def BatchNetwork_writeRows(self, time, resultsFile):
+        R, N = self.numReplicates, self.numAgents
+        rows = np.column_stack([np.repeat(np.arange(R), N),
+            np.full(R * N, time), np.tile(np.arange(N), R),
+            self.num_stray_dogs.ravel(), self.normal_attitude.ravel(),
+            self.p_acquire.ravel(), self.p_release.ravel(),
+            self.norm_education_level.ravel()])
+        with open(resultsFile, 'a') as f:
+            np.savetxt(f, rows, delimiter=',',
+                fmt=['%d'] * 4 + ['%s'] * 4)
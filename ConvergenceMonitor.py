@@ -0,0 +1,157 @@
+"""
+author = Yash Patel and DoWon Kim
+name = ConvergenceMonitor.py
+description: Contains all the methods pertinent to detecting when a
+simulation has reached a steady state (over population aggregates)
+so that it can be terminated early
+"""
+
+import csv
+import os
+import numpy as np
+
+#####################################################################
+# Given the results file of a run, returns the path of the summary  #
+# file written next to it                                           #
+#####################################################################
+def ConvergenceMonitor_summaryFile(resultsFile):
+    return "{}_convergence.csv".format(os.path.splitext(resultsFile)[0])
+
+class ConvergenceMonitor:
+    #################################################################
+    # Given the window (in time steps) over which the aggregates    #
+    # are compared, the tolerated relative growth of the stray      #
+    # count, the tolerated drift of the mean (normalized) attitude  #
+    # and education, and what to do on convergence ('stop' to end   #
+    # the run, 'extrapolate' to also project the aggregates to the  #
+    # end of the time span), initializes the monitor                #
+    #################################################################
+    def __init__(self, window=5, strayTol=.01, attitudeTol=.005,
+        educationTol=.005, onConverge='stop'):
+        if onConverge not in ('stop', 'extrapolate'):
+            raise ValueError("onConverge must be 'stop' or 'extrapolate'")
+
+        self.window = window
+        self.strayTol = strayTol
+        self.attitudeTol = attitudeTol
+        self.educationTol = educationTol
+        self.onConverge = onConverge
+        self.ConvergenceMonitor_start()
+
+    #################################################################
+    # Clears the aggregates and stop recorded so far: called at the #
+    # start of every run, so that a monitor can be reused in sweeps #
+    #################################################################
+    def ConvergenceMonitor_start(self):
+        self.times = []
+        self.history = []
+
+        self.stopTime = None
+        self.reason = None
+        self.converged = False
+
+    #################################################################
+    # Returns the configuration of the monitor (used to identify    #
+    # runs in the cache)                                            #
+    #################################################################
+    def ConvergenceMonitor_getConfig(self):
+        return {'window': self.window, 'strayTol': self.strayTol,
+            'attitudeTol': self.attitudeTol,
+            'educationTol': self.educationTol,
+            'onConverge': self.onConverge}
+
+    #################################################################
+    # Given the current time and the population aggregates (stray   #
+    # count, mean attitude, mean education: scalars for a single    #
+    # run or arrays with one entry per replicate), records them and #
+    # returns whether the run has converged. Batched runs converge  #
+    # once every replicate satisfies all the criteria               #
+    #################################################################
+    def ConvergenceMonitor_update(self, time, strays, attitude, education):
+        self.times.append(time)
+        self.history.append((np.atleast_1d(strays).astype(float),
+            np.atleast_1d(attitude), np.atleast_1d(education)))
+
+        if len(self.history) <= self.window:
+            return False
+
+        strays_0, attitude_0, education_0 = self.history[-1 - self.window]
+        strays_1, attitude_1, education_1 = self.history[-1]
+
+        stray_growth = np.abs(strays_1 - strays_0)/np.maximum(strays_0, 1)
+        criteria = [
+            ('stray growth', np.all(stray_growth <= self.strayTol)),
+            ('attitude drift', np.all(
+                np.abs(attitude_1 - attitude_0) <= self.attitudeTol)),
+            ('education drift', np.all(
+                np.abs(education_1 - education_0) <= self.educationTol))
+        ]
+        if not all(met for (name, met) in criteria):
+            return False
+
+        self.stopTime = time
+        self.reason = "steady state over {} steps ({})".format(
+            self.window, ", ".join(name for (name, met) in criteria))
+        self.converged = True
+        return True
+
+    #################################################################
+    # Given the time and reason a run was stopped before converging #
+    # (e.g. the soft memory limit) and the aggregates at that time, #
+    # records them as the end of the run                            #
+    #################################################################
+    def ConvergenceMonitor_stop(self, time, reason, strays, attitude, 
+        education):
+        if not self.times or self.times[-1] != time:
+            self.times.append(time)
+            self.history.append((np.atleast_1d(strays).astype(float),
+                np.atleast_1d(attitude), np.atleast_1d(education)))
+
+        self.stopTime = time
+        self.reason = reason
+        self.converged = False
+
+    #################################################################
+    # Given a time (at or after the last one recorded), returns the #
+    # aggregates linearly extrapolated from their trend over the    #
+    # last window, clipped to their valid ranges                    #
+    #################################################################
+    def ConvergenceMonitor_extrapolate(self, time):
+        window = min(self.window, len(self.history) - 1)
+        last = self.history[-1]
+        if window == 0:
+            return last
+
+        first = self.history[-1 - window]
+        steps = self.times[-1] - self.times[-1 - window]
+        ahead = time - self.times[-1]
+
+        strays, attitude, education = [cur + (cur - prev)/steps * ahead
+            for (prev, cur) in zip(first, last)]
+        return (np.maximum(strays, 0), np.clip(attitude, 0, 1),
+            np.clip(education, 0, 1))
+
+    #################################################################
+    # Given the results file of the run and its time span, writes   #
+    # the stopping time, reason, and final aggregates (extrapolated #
+    # to the time span for converged runs if so configured) per     #
+    # replicate next to it                                          #
+    #################################################################
+    def ConvergenceMonitor_writeSummary(self, resultsFile, timeSpan):
+        if resultsFile is None or not self.history:
+            return
+
+        stopTime, reason = self.stopTime, self.reason
+        if stopTime is None:
+            stopTime, reason = timeSpan, "time span reached"
+
+        final = self.history[-1]
+        if self.converged and self.onConverge == 'extrapolate':
+            final = self.ConvergenceMonitor_extrapolate(timeSpan)
+
+        with open(ConvergenceMonitor_summaryFile(resultsFile), 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(['replicate', 'stop_time', 'reason',
+                'stray_dogs', 'attitude', 'norm_education_level'])
+            for (replicate, row) in enumerate(zip(*final)):
+                writer.writerow([replicate, stopTime, reason] + list(row))
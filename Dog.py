@@ -6,10 +6,30 @@ description:
 
 import random
 import numpy as np
+
+from Scheduler import Scheduler_hazard
+
+# minimum time (in time steps, i.e. years) between two litters of a dog
 MIN_GESTATION = 5
 
 class Dog:
+    # fixed attribute layout (no per-dog __dict__): dogID is the slot
+    # the dog occupies in the DogPool and is_alive whether it is in use
+    __slots__ = ('dogID', 'is_alive', 'owner', 'network', 'loc', 
+        'prob_rand_reproduce', 'prob_reproduce', 'is_steralized', 
+        'last_birth', 'age')
+
     def __init__(self, owner, network, loc):
+        self.dogID = None
+        self.Dog_reset(owner, network, loc)
+
+    #################################################################
+    # Given the owner (None for strays), network, and location of   #
+    # a dog, (re)initializes its state: used both for new dogs and  #
+    # for dogs recycled from the free slots of a DogPool            #
+    #################################################################
+    def Dog_reset(self, owner, network, loc):
+        self.is_alive = True
         self.owner = owner
         self.network = network
         self.loc = loc
@@ -19,37 +39,99 @@ class Dog:
         self.is_steralized = False
 
         self.last_birth = float("inf")
+        self.age = 0
 
-    def Dog_update_reproduce(self):
-        self.prob_rand_reproduce = \
-            random.uniform(self.prob_rand_reproduce, 1)
+    #################################################################
+    # Given the time elapsed (in time steps), moves the random part #
+    # of the probability of reproducing towards 1 (uniformly for a  #
+    # full time step) and updates that probability                  #
+    #################################################################
+    def Dog_update_reproduce(self, elapsed=1):
+        self.prob_rand_reproduce += (1 - self.prob_rand_reproduce) * \
+            Scheduler_hazard(random.random(), elapsed)
         el_factor = 1
         if self.owner is not None:
         	el_factor = self.owner.norm_education_level
         self.prob_reproduce = 1/(1 + 10 * el_factor *
             np.exp(-self.prob_rand_reproduce/2))
 
-    def Dog_reproduce(self):
+    #################################################################
+    # Given the time elapsed since the last reproduction phase (in  #
+    # time steps, as MIN_GESTATION), possibly produces a puppy      #
+    #################################################################
+    def Dog_reproduce(self, elapsed=1):
         if self.is_steralized:
             return
 
-        self.last_birth += 1
+        self.last_birth += elapsed
         rand = random.random()
 
         if self.last_birth > MIN_GESTATION:
-            self.Dog_update_reproduce()
+            self.Dog_update_reproduce(elapsed)
 
         # produces new dog (i.e. has reproduced)
-        if rand < self.prob_reproduce:
+        if rand < Scheduler_hazard(self.prob_reproduce, elapsed):
             if self.owner is not None:
                 self.owner.Agent_new_dog()
             else:
-                dog = Dog(None, self.network, self.loc)
-                self.network.networkBase.dogs.append(dog) 
-                self.network.networkBase.num_dogs += 1
+                dog = self.network.networkBase.NetworkBase_newDog(
+                    None, self.network, self.loc)
                 self.network.networkBase.NetworkBase_addStray(
                 	self.loc, dog)
             
             self.prob_rand_reproduce = 0
             self.prob_reproduce = 0
-            self.last_birth = 0
\ No newline at end of file
+            self.last_birth = 0
+
+    #################################################################
+    # Given the time elapsed (in time steps), ages the dog by it    #
+    # and returns its new age (only tracked for networks with a dog #
+    # lifespan, see NetworkBase_setLifespan)                        #
+    #################################################################
+    def Dog_getOlder(self, elapsed=1):
+        self.age += elapsed
+        return self.age
+
+#####################################################################
+# Registry of all the dogs in a network: dogs are kept in a list of #
+# slots, and the slots of removed dogs are recycled (along with the #
+# Dog objects themselves) for the next dogs created                 #
+#####################################################################
+class DogPool:
+    __slots__ = ('slots', 'free')
+
+    def __init__(self):
+        self.slots = []
+        self.free = []
+
+    def __iter__(self):
+        for dog in self.slots:
+            if dog.is_alive:
+                yield dog
+
+    def __len__(self):
+        return len(self.slots) - len(self.free)
+
+    #################################################################
+    # Given the owner (None for strays), network, and location,     #
+    # returns a dog occupying a free slot if there is one, else     #
+    # a newly allocated dog in a new slot                           #
+    #################################################################
+    def DogPool_newDog(self, owner, network, loc):
+        if self.free:
+            dog = self.slots[self.free.pop()]
+            dog.Dog_reset(owner, network, loc)
+            return dog
+
+        dog = Dog(owner, network, loc)
+        dog.dogID = len(self.slots)
+        self.slots.append(dog)
+        return dog
+
+    #################################################################
+    # Given a dog in the pool, marks its slot as free for reuse     #
+    #################################################################
+    def DogPool_freeDog(self, dog):
+        dog.is_alive = False
+        dog.owner = None
+        self.free.append(dog.dogID)
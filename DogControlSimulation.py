@@ -9,13 +9,24 @@ and depression (SMD simulation)
 import sys
 import os
 import csv
+import pickle
 import random,itertools
 import numpy as np
 
 from NetworkBase import NetworkBase
-from ERNetwork import ERNetwork
-from ASFNetwork import ASFNetwork
-from SWNetwork import SWNetwork
+from ERNetwork import ERNetwork, ERNetwork_createGraph
+from ASFNetwork import ASFNetwork, ASFNetwork_createGraph
+from SWNetwork import SWNetwork, SWNetwork_createGraph
+from BatchNetwork import BatchNetwork
+from ConvergenceMonitor import ConvergenceMonitor, \
+    ConvergenceMonitor_summaryFile
+from RunCache import RunCache
+from MemoryMonitor import MemoryMonitor
+from Scheduler import Scheduler
+from TwoHopIndex import TWO_HOP_BUDGET, TWO_HOP_DEGREE_CAP
+from Agent import SCALE, DOG_IMPACT, NETWORK_IMPACT
+from Dog import MIN_GESTATION
+import AgentFactory
 
 import matplotlib.pyplot as plt
 from operator import itemgetter 
@@ -32,22 +43,74 @@ class DogSimulationModel:
     # of agents in the network, a simulation is created and run for #
     # testing depression as a function of minority prevalence. Also #
     # have control on the impact ratings of each of the parameters: #
-    # defaults have been provided                                   #
+    # defaults have been provided. numReplicates > 1 runs that many #
+    # independent replicates on the same graph at once (batched).   #
+    # A ConvergenceMonitor can be given to end runs early once they #
+    # reach a steady state, and a RunCache to reuse the results of  #
+    # identical (seeded) runs: on a cache hit, the network is never #
+    # generated. With twoHop, agents are influenced by their whole  #
+    # two-hop social network rather than their direct neighbors,    #
+    # indexed within twoHopBudget bytes, following two-hop links    #
+    # only through agents of degree up to twoHopDegreeCap. A        #
+    # MemoryMonitor can be given to account for the memory of each  #
+    # structure and checkpoint/stop runs over a soft memory limit,  #
+    # and a Scheduler to run each phase of the simulation at its    #
+    # own interval of two-week ticks rather than once a year. Dogs  #
+    # never die unless given a dogLifespan (in time steps)          #
     #################################################################
-    def __init__(self, networkType='ER', timeSpan=10, numAgents=10):
+    def __init__(self, networkType='ER', timeSpan=10, numAgents=10,
+        numReplicates=1, seed=None, monitor=None, cache=None, 
+        twoHop=False, memory=None, scheduler=None, 
+        twoHopBudget=TWO_HOP_BUDGET, twoHopDegreeCap=TWO_HOP_DEGREE_CAP,
+        dogLifespan=None):
         self.networkType = networkType
         self.timeSpan = timeSpan
         self.numAgents = numAgents
+        self.numReplicates = numReplicates
+        self.seed = seed
+        self.monitor = monitor
+        self.cache = cache
+        self.twoHop = twoHop
+        self.twoHopBudget = twoHopBudget
+        self.twoHopDegreeCap = twoHopDegreeCap
+        self.memory = memory
+        self.scheduler = scheduler
+        self.dogLifespan = dogLifespan
 
-        self.DogModel_setNetwork()
+        self.network = None
+        self.batch = None
+        self.aggregates = None
+        if not self.DogModel_isCached():
+            self.DogModel_setNetwork()
         
     #################################################################
     # Based on the specified value of the network type, generates   #
     # and sets the network accordingly. Sets the initial value of   #
     # simulation to those specified in the parameters (attitude_0   #
-    # corresponds to initial value of attitude, etc...)             #
+    # corresponds to initial value of attitude, etc...). Batched    #
+    # runs only generate the graph, which their replicates share    #
     #################################################################
     def DogModel_setNetwork(self):
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+
+        if self.numReplicates > 1:
+            if self.networkType == 'ER':
+                G = ERNetwork_createGraph(self.numAgents)
+            elif self.networkType == 'SW':
+                G = SWNetwork_createGraph(self.numAgents)
+            else:
+                G = ASFNetwork_createGraph(self.numAgents)
+
+            self.batch = BatchNetwork(G, self.timeSpan,
+                self.numReplicates, self.seed)
+            self.batch.BatchNetwork_setLifespan(self.dogLifespan)
+            if self.twoHop:
+                self.batch.BatchNetwork_setupTwoHop(self.twoHopBudget,
+                    self.twoHopDegreeCap)
+            return
+
         if self.networkType == 'ER':
             self.network = ERNetwork(self.numAgents, self.timeSpan)
         elif self.networkType == 'SW':
@@ -55,6 +118,11 @@ class DogSimulationModel:
         else:
             self.network = ASFNetwork(self.numAgents, self.timeSpan)
 
+        self.network.networkBase.NetworkBase_setLifespan(self.dogLifespan)
+        if self.twoHop:
+            self.network.networkBase.NetworkBase_setupTwoHop(
+                self.twoHopBudget, self.twoHopDegreeCap)
+
     #################################################################
     # Writes the header of the CSV file to be given as output in the#
     # specified file                                                #
@@ -86,24 +154,290 @@ class DogSimulationModel:
 
                     writer.writerow(row)
 
+    #################################################################
+    # Returns the full configuration of the simulation: used as the #
+    # key of the run in the cache                                   #
+    #################################################################
+    def DogModel_getConfig(self):
+        config = {
+            'networkType': self.networkType,
+            'timeSpan': self.timeSpan,
+            'numAgents': self.numAgents,
+            'numReplicates': self.numReplicates,
+            'seed': self.seed,
+            'twoHop': self.twoHop,
+            'twoHopBudget': self.twoHopBudget,
+            'twoHopDegreeCap': self.twoHopDegreeCap,
+            'dogLifespan': self.dogLifespan,
+            'SCALE': SCALE,
+            'DOG_IMPACT': DOG_IMPACT,
+            'NETWORK_IMPACT': NETWORK_IMPACT,
+            'MIN_GESTATION': MIN_GESTATION,
+            'MEAN_RES': AgentFactory.MEAN_RES,
+            'VAR_RES': AgentFactory.VAR_RES,
+            'MEAN_DOG': AgentFactory.MEAN_DOG,
+            'VAR_DOG': AgentFactory.VAR_DOG
+        }
+        if self.monitor is not None:
+            config['monitor'] = self.monitor.ConvergenceMonitor_getConfig()
+        if self.scheduler is not None:
+            config['scheduler'] = self.scheduler.Scheduler_getConfig()
+        return config
+
+    #################################################################
+    # Returns whether the results of this run can be taken from the #
+    # cache: only seeded runs are reproducible, and so cacheable,   #
+    # and the cached entry must hold every file the run writes      #
+    #################################################################
+    def DogModel_isCached(self):
+        if self.cache is None or self.seed is None:
+            return False
+
+        files = self.DogModel_getResultFiles("results.csv")
+        return self.cache.RunCache_contains(
+            self.cache.RunCache_key(self.DogModel_getConfig()),
+            [name for name in files if files[name] is not None])
+
+    #################################################################
+    # Given the results file, returns the result files of the run   #
+    # by the name under which they are cached                       #
+    #################################################################
+    def DogModel_getResultFiles(self, resultsFile):
+        files = {'results.csv': resultsFile, 'convergence.csv': None}
+        if resultsFile is not None and self.monitor is not None:
+            files['convergence.csv'] = \
+                ConvergenceMonitor_summaryFile(resultsFile)
+        return files
+
     #################################################################
     # Runs simulation over the desired timespan and produces/outputs#
-    # results in CSV file specified along with displaying graphics  #
+    # results in CSV file specified along with displaying graphics. #
+    # Results of cached runs are copied to the results file instead #
+    # and the final aggregates are left in self.aggregates          #
     #################################################################
     def DogModel_runSimulation(self, resultsFile):
-        self.DogModel_writeSimulationHeader(resultsFile)
+        useCache = self.cache is not None and self.seed is not None
+        if useCache:
+            key = self.cache.RunCache_key(self.DogModel_getConfig())
+            aggregates = self.cache.RunCache_restore(key, 
+                self.DogModel_getResultFiles(resultsFile))
+            if aggregates is not None:
+                print("Restored results from cache")
+                self.aggregates = aggregates
+                return
+
+        if self.network is None and self.batch is None:
+            self.DogModel_setNetwork()
+        self.DogModel_simulate(resultsFile, 0)
+
+        # runs stopped over the memory limit are incomplete
+        stopped = self.memory is not None and \
+            self.memory.stopTime is not None
+        if useCache and not stopped:
+            self.cache.RunCache_store(key, self.DogModel_getConfig(), 
+                self.DogModel_getResultFiles(resultsFile), self.aggregates)
+
+    #################################################################
+    # Given the checkpoint file of a run stopped over the soft      #
+    # memory limit and the results file the run was writing,        #
+    # restores the network (or BatchNetwork) and random states of   #
+    # the checkpoint and resumes the run from its time step,        #
+    # appending to the results. Resumed runs are not cached         #
+    #################################################################
+    def DogModel_resumeSimulation(self, checkpointFile, resultsFile):
+        # drops the freshly generated network before loading the state
+        self.network = None
+        self.batch = None
+        with open(checkpointFile, 'rb') as f:
+            checkpoint = pickle.load(f)
+
+        random.setstate(checkpoint['random'])
+        np.random.set_state(checkpoint['numpy'])
+        if self.numReplicates > 1:
+            self.batch = checkpoint['state']
+        else:
+            self.network = checkpoint['state']
+
+        if self.monitor is not None and not self.monitor.converged:
+            self.monitor.stopTime = None
+            self.monitor.reason = None
+
+        print("Resuming from time step {}".format(checkpoint['time']))
+        self.DogModel_simulate(resultsFile, checkpoint['time'])
+
+    #################################################################
+    # Given the results file and the time step to start from (0 for #
+    # a new run), runs the simulation to the end of the timespan    #
+    # and leaves the final aggregates in self.aggregates            #
+    #################################################################
+    def DogModel_simulate(self, resultsFile, startTime):
+        if self.monitor is not None and startTime == 0:
+            self.monitor.ConvergenceMonitor_start()
+        if self.memory is not None:
+            self.memory.MemoryMonitor_start(resultsFile, startTime > 0)
+
+        if self.numReplicates > 1:
+            self.DogModel_runBatchSimulation(resultsFile, startTime)
+        else:
+            self.DogModel_runNetworkSimulation(resultsFile, startTime)
+        self.aggregates = [np.atleast_1d(aggregate).tolist() 
+            for aggregate in self.DogModel_getAggregates()]
+
+    #################################################################
+    # Returns the current population aggregates of the run (arrays  #
+    # with one entry per replicate for batched runs)                #
+    #################################################################
+    def DogModel_getAggregates(self):
+        if self.numReplicates > 1:
+            return self.batch.BatchNetwork_getAggregates()
+        return self.network.networkBase.NetworkBase_getAggregates()
+
+    #################################################################
+    # Given the results file and the time step to start from, runs  #
+    # the (single) simulation on the network over the timespan      #
+    #################################################################
+    def DogModel_runNetworkSimulation(self, resultsFile, startTime=0):
+        if startTime == 0:
+            self.DogModel_writeSimulationHeader(resultsFile)
 
         # Converts from years to "ticks" (represent 2 week span)
         numTicks = self.timeSpan * 26
         pos = nx.random_layout(self.network.G)
-        for i in range(0, self.timeSpan):
+        for i in range(startTime, self.timeSpan):
             if i % 10 == 0:
                 self.DogModel_writeSimulationData(i, resultsFile)   
 
                 print("Plotting time step {}".format(i))
                 self.network.networkBase.\
                     NetworkBase_visualizeNetwork(False, i, pos)
-            self.network.networkBase.NetworkBase_timeStep(i)
+                self.DogModel_recordMemory(i)
+            self.DogModel_advanceYear(i)
+
+            if self.DogModel_overMemory(i, resultsFile):
+                break
+            if self.DogModel_hasConverged(i, 
+                self.DogModel_getAggregates()):
+                break
+        self.DogModel_writeConvergence(resultsFile)
+
+    #################################################################
+    # Given the results file and the time step to start from, runs  #
+    # all replicates over the desired timespan in batched form,     #
+    # writing a CSV with a leading replicate column (no graphics)   #
+    #################################################################
+    def DogModel_runBatchSimulation(self, resultsFile, startTime=0):
+        if resultsFile is not None and startTime == 0:
+            columns = ['replicate', 'time', 'agentID', 'stray_dogs', 
+            'attitude', 'prob_acquire', 'prob_release', 
+            'norm_education_level']
+            with open(resultsFile, 'w') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+
+        for i in range(startTime, self.timeSpan):
+            if i % 10 == 0:
+                if resultsFile is not None:
+                    self.batch.BatchNetwork_writeRows(i, resultsFile)
+                self.DogModel_recordMemory(i)
+            self.DogModel_advanceYear(i)
+
+            if self.DogModel_overMemory(i, resultsFile):
+                break
+            if self.DogModel_hasConverged(i, 
+                self.DogModel_getAggregates()):
+                break
+        self.DogModel_writeConvergence(resultsFile)
+
+    #################################################################
+    # Given the current time (year), simulates it: as a single time #
+    # step, or tick by tick if a scheduler was given                #
+    #################################################################
+    def DogModel_advanceYear(self, time):
+        if self.numReplicates > 1:
+            if self.scheduler is None:
+                self.batch.BatchNetwork_timeStep(time)
+            else:
+                self.scheduler.Scheduler_runYear(
+                    self.batch.BatchNetwork_getPhases(), time)
+            return
+
+        networkBase = self.network.networkBase
+        if self.scheduler is None:
+            networkBase.NetworkBase_timeStep(time)
+        else:
+            self.scheduler.Scheduler_runYear(
+                networkBase.NetworkBase_getPhases(), time)
+
+    #################################################################
+    # Given the current time, records the memory taken by each of   #
+    # the structures of the run (if a memory monitor was given)     #
+    #################################################################
+    def DogModel_recordMemory(self, time):
+        if self.memory is None:
+            return
+        self.memory.MemoryMonitor_record(time, 
+            self.DogModel_measureMemory())
+
+    #################################################################
+    # Returns the count of items held and bytes taken by each of    #
+    # the structures of the run (a memory monitor must be given)    #
+    #################################################################
+    def DogModel_measureMemory(self):
+        if self.numReplicates > 1:
+            return self.memory.MemoryMonitor_measureBatch(self.batch)
+        return self.memory.MemoryMonitor_measureNetwork(
+            self.network.networkBase)
+
+    #################################################################
+    # Given the time step just simulated and the results file,      #
+    # returns whether the run is over the soft memory limit, in     #
+    # which case it is checkpointed (to be resumed from the next    #
+    # time step by DogModel_resumeSimulation) and the stop is       #
+    # recorded by the convergence monitor (if one was given)        #
+    #################################################################
+    def DogModel_overMemory(self, time, resultsFile):
+        if self.memory is None or \
+            not self.memory.MemoryMonitor_overLimit(
+            self.DogModel_measureMemory):
+            return False
+
+        print("Over the soft memory limit at time step {}: "
+            "checkpointing and stopping".format(time))
+        self.DogModel_recordMemory(time + 1)
+        if self.numReplicates > 1:
+            state = self.batch
+        else:
+            state = self.network
+        self.memory.MemoryMonitor_checkpoint(time + 1, state, resultsFile)
+
+        if self.monitor is not None:
+            self.monitor.ConvergenceMonitor_stop(time, "soft memory limit",
+                *self.DogModel_getAggregates())
+        return True
+
+    #################################################################
+    # Given the time step just simulated and the aggregates after   #
+    # it, returns whether the run has reached a steady state (never #
+    # the case when no monitor was given)                           #
+    #################################################################
+    def DogModel_hasConverged(self, time, aggregates):
+        if self.monitor is None:
+            return False
+
+        if self.monitor.ConvergenceMonitor_update(time, *aggregates):
+            print("Converged at time step {}: {}".format(time, 
+                self.monitor.reason))
+            return True
+        return False
+
+    #################################################################
+    # Writes the stopping time and reason of the run next to the    #
+    # results file (if a monitor was given)                         #
+    #################################################################
+    def DogModel_writeConvergence(self, resultsFile):
+        if self.monitor is not None:
+            self.monitor.ConvergenceMonitor_writeSummary(resultsFile, 
+                self.timeSpan)
 
 #####################################################################
 # Given the paramters of the simulation (upon being prompted on)    #
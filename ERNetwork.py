@@ -23,6 +23,19 @@ except ImportError:
     raise ImportError("You must install NetworkX:\
     (http://networkx.lanl.gov/) for SE simulation")
 
+#####################################################################
+# Given a nodeCount and the probability of attaching to other nodes #
+# returns an ER graph over nodes 0..nodeCount-1 (graph only: used   #
+# as is by batched runs, which do not need the agents)              #
+#####################################################################
+def ERNetwork_createGraph(nodeCount, p = 0.25):
+    G = nx.generators.random_graphs.fast_gnp_random_graph(
+                n = nodeCount,
+                p = p,
+                seed = None)
+    G.name = "erdosrenyi_graph(%s,%s)"%(nodeCount, p)
+    return G
+
 class ERNetwork:
     #################################################################
     # Given a nodeCount for the number of agents to be simulated,   #
@@ -52,11 +65,7 @@ class ERNetwork:
     # Creates the agents present in the simulation (ER graph)       #
     #################################################################
     def ERNetwork_createAgents(self):
-        self.G = nx.generators.random_graphs.fast_gnp_random_graph(
-                    n = self.nodeCount,
-                    p = self.p,
-                    seed = None)
-        self.G.name = "erdosrenyi_graph(%s,%s)"%(self.nodeCount, self.p)
+        self.G = ERNetwork_createGraph(self.nodeCount, self.p)
 
         for i in range(0, self.nodeCount):    
             curAgent = self.agentFactory.AgentFactory_createAgent(self, i)
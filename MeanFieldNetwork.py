@@ -0,0 +1,268 @@
+"""
+author = Yash Patel and DoWon Kim
+name = MeanFieldNetwork.py
+description: Contains all the methods pertinent to the mean-field
+approximation of the simulation: expected values per household are
+advanced deterministically instead of sampling individual events, for
+quick scans over parameter settings
+"""
+
+import csv
+import time
+import numpy as np
+
+from Agent import SCALE, DOG_IMPACT, NETWORK_IMPACT
+from Dog import MIN_GESTATION
+
+# expected value of prob_rand_reproduce when a dog is ready to breed
+MEAN_RAND_REPRODUCE = .75
+
+class MeanFieldNetwork:
+    #################################################################
+    # Given a BatchNetwork (from which the graph and initial state  #
+    # of each of its replicates are taken), initializes one         #
+    # mean-field row per replicate. The model constants may also be #
+    # given as arrays with one value per row, so that a single run  #
+    # scans as many parameter settings as there are replicates      #
+    #################################################################
+    def __init__(self, batch, scale=SCALE, dogImpact=DOG_IMPACT,
+        networkImpact=NETWORK_IMPACT):
+        R, N = batch.numReplicates, batch.numAgents
+        self.timeSpan = batch.timeSpan
+        self.numRows = R
+        self.numAgents = N
+
+        self.A = batch.A
+        self.degree = batch.degree
+        self.influence = batch.influence
+        self.influence_count = batch.influence_count
+
+        self.scale = self.MeanFieldNetwork_perRow(scale)
+        self.dogImpact = self.MeanFieldNetwork_perRow(dogImpact)
+        self.networkImpact = self.MeanFieldNetwork_perRow(networkImpact)
+
+        self.dog_education = batch.dog_education
+        self.attitude = batch.attitude.copy()
+        self.normal_attitude = batch.normal_attitude.copy()
+        self.education_level = batch.education_level.copy()
+        self.norm_education_level = batch.norm_education_level.copy()
+        self.num_stray_dogs = batch.num_stray_dogs.astype(float)
+
+        # expected dog counts per household: owned/stray, fertile or
+        # steralized. Fertile counts are split by gestation stage,
+        # index 0 holding the dogs ready to breed and index k > 0
+        # those that gave birth k - 1 steps ago (the initial dogs have
+        # never given birth, so all start out ready)
+        dogs = batch.dogs
+        flat = dogs['rep'] * N + dogs['loc']
+        def count(mask):
+            return np.bincount(flat[mask], minlength=R * N).\
+                reshape(R, N).astype(float)
+        def stages(ready):
+            fertile = np.zeros((MIN_GESTATION + 1, R, N))
+            fertile[0] = ready
+            return fertile
+        fertile = ~dogs['is_steralized']
+        self.owned_fertile = stages(count(dogs['owned'] & fertile))
+        self.owned_steralized = count(dogs['owned'] & ~fertile)
+        self.stray_fertile = stages(count(~dogs['owned'] & fertile))
+        self.stray_steralized = count(~dogs['owned'] & ~fertile)
+
+    def MeanFieldNetwork_perRow(self, value):
+        value = np.asarray(value, dtype=float)
+        if value.ndim == 0:
+            return value
+        return value.reshape(self.numRows, 1)
+
+    def MeanFieldNetwork_normalize(self, val):
+        return 1/(1 + np.exp(-(val - 5)))
+
+    def MeanFieldNetwork_neighborMean(self, values):
+        totals = self.influence.dot(values.T).T
+        return totals/np.maximum(self.influence_count, 1)
+
+    #################################################################
+    # Given the (normalized) education factor of the dogs' owners   #
+    # (1 for strays), returns the expected births per dog ready to  #
+    # breed: Dog_reproduce's probability at the expected random     #
+    # factor                                                        #
+    #################################################################
+    def MeanFieldNetwork_birthRate(self, el_factor):
+        return 1/(1 + 10 * el_factor * np.exp(-MEAN_RAND_REPRODUCE/2))
+
+    #################################################################
+    # Given the fertile counts by gestation stage and the births of #
+    # the dogs ready to breed, returns the counts one step later:   #
+    # mothers start waiting, newborns are ready at once (as in Dog, #
+    # last_birth starts out infinite) and the dogs that have waited #
+    # MIN_GESTATION steps are ready again                           #
+    #################################################################
+    def MeanFieldNetwork_advanceGestation(self, fertile, births):
+        advanced = np.empty_like(fertile)
+        if MIN_GESTATION == 0:
+            advanced[0] = fertile[0] + births
+            return advanced
+
+        advanced[0] = fertile[0] + fertile[-1]
+        advanced[1] = births
+        advanced[2:] = fertile[1:-1]
+        return advanced
+
+    #################################################################
+    # Advances the expected state by one time step, in the same     #
+    # order as NetworkBase_timeStep                                 #
+    #################################################################
+    def MeanFieldNetwork_timeStep(self, time):
+        self.MeanFieldNetwork_updateAgents()
+        self.MeanFieldNetwork_reproduce()
+        self.MeanFieldNetwork_spreadStray()
+        if time >= self.timeSpan/2:
+            self.dog_education += 2/self.timeSpan
+
+    def MeanFieldNetwork_updateAgents(self):
+        mean_attitude = self.MeanFieldNetwork_neighborMean(self.attitude)
+        mean_education = \
+            self.MeanFieldNetwork_neighborMean(self.education_level)
+
+        delta_attitude = self.scale * self.norm_education_level/(1 +
+            self.num_stray_dogs)
+        delta_attitude *= self.scale * mean_attitude
+        delta_attitude -= self.scale
+        self.attitude = self.attitude + delta_attitude
+        self.normal_attitude = \
+            self.MeanFieldNetwork_normalize(self.attitude)
+
+        num_dogs = self.owned_fertile.sum(axis=0) + self.owned_steralized
+        p_acquire = self.normal_attitude/(1 + num_dogs)
+        p_release = np.exp(-self.normal_attitude)/2
+
+        delta_education = self.dogImpact * mean_education
+        delta_education += self.networkImpact * self.dog_education * \
+            (1 - (self.norm_education_level - .5) ** 2)
+        self.education_level = self.education_level + delta_education
+        self.norm_education_level = \
+            self.MeanFieldNetwork_normalize(self.education_level)
+
+        p_sterilization = self.norm_education_level ** 2
+
+        # acquired dogs are ready to breed, then every owned dog may
+        # be steralized and released
+        self.owned_fertile[0] += p_acquire
+        steralized = self.owned_fertile * p_sterilization
+        self.owned_fertile = self.owned_fertile - steralized
+        self.owned_steralized = self.owned_steralized + steralized.sum(axis=0)
+
+        released_fertile = self.owned_fertile * p_release
+        released_steralized = self.owned_steralized * p_release
+        self.owned_fertile = self.owned_fertile - released_fertile
+        self.owned_steralized = self.owned_steralized - released_steralized
+        self.stray_fertile = self.stray_fertile + released_fertile
+        self.stray_steralized = self.stray_steralized + released_steralized
+
+        self.num_stray_dogs = self.stray_fertile.sum(axis=0) + \
+            self.stray_steralized
+
+    def MeanFieldNetwork_reproduce(self):
+        births = self.owned_fertile[0] * \
+            self.MeanFieldNetwork_birthRate(self.norm_education_level)
+        self.owned_fertile = \
+            self.MeanFieldNetwork_advanceGestation(self.owned_fertile, births)
+
+        births = self.stray_fertile[0] * self.MeanFieldNetwork_birthRate(1)
+        self.stray_fertile = \
+            self.MeanFieldNetwork_advanceGestation(self.stray_fertile, births)
+
+    #################################################################
+    # Propagates the expected stray counts one step of the random   #
+    # walk on the graph (strays at isolated agents stay in place)   #
+    #################################################################
+    def MeanFieldNetwork_spreadStray(self):
+        N = self.numAgents
+        isolated = (self.degree == 0)
+        def walk(counts):
+            flat = counts.reshape(-1, N)
+            moved = self.A.dot((flat/np.maximum(self.degree, 1)).T).T
+            return (moved + flat * isolated).reshape(counts.shape)
+        self.stray_fertile = walk(self.stray_fertile)
+        self.stray_steralized = walk(self.stray_steralized)
+
+    #################################################################
+    # Returns the expected population aggregates of each row, in    #
+    # the form of BatchNetwork_getAggregates                        #
+    #################################################################
+    def MeanFieldNetwork_getAggregates(self):
+        strays = self.stray_fertile.sum(axis=(0, 2)) + \
+            self.stray_steralized.sum(axis=1)
+        return (strays, self.normal_attitude.mean(axis=1),
+            self.norm_education_level.mean(axis=1))
+
+    #################################################################
+    # Runs the approximation over the time span, returning the      #
+    # aggregates after each time step                               #
+    #################################################################
+    def MeanFieldNetwork_run(self):
+        trajectory = []
+        for i in range(0, self.timeSpan):
+            self.MeanFieldNetwork_timeStep(i)
+            trajectory.append(self.MeanFieldNetwork_getAggregates())
+        return trajectory
+
+#####################################################################
+# Given a calibration set of (networkType, numAgents, timeSpan)     #
+# configurations, the number of stochastic replicates to compare    #
+# against, a seed, and (optionally) a file to write the report to,  #
+# runs both engines from the same initial states and returns, per   #
+# configuration, the deviation of the mean-field aggregates from    #
+# the replicate average of the stochastic ones along with the time  #
+# taken by each engine                                              #
+#####################################################################
+def MeanFieldNetwork_calibrate(configs, numReplicates=10, seed=None,
+    reportFile=None):
+    from DogControlSimulation import DogSimulationModel
+
+    report = []
+    for (networkType, numAgents, timeSpan) in configs:
+        model = DogSimulationModel(networkType, timeSpan, numAgents,
+            max(numReplicates, 2), seed)
+        batch = model.batch
+        meanField = MeanFieldNetwork(batch)
+
+        start = time.time()
+        approx = meanField.MeanFieldNetwork_run()
+        meanFieldTime = time.time() - start
+
+        start = time.time()
+        exact = []
+        for i in range(0, timeSpan):
+            batch.BatchNetwork_timeStep(i)
+            exact.append(batch.BatchNetwork_getAggregates())
+        stochasticTime = time.time() - start
+
+        # relative error of the stray count, absolute error of the
+        # mean attitude/education (both already on [0, 1])
+        deviations = np.array([[
+            abs(np.mean(a[0]) - np.mean(e[0]))/max(np.mean(e[0]), 1),
+            abs(np.mean(a[1]) - np.mean(e[1])),
+            abs(np.mean(a[2]) - np.mean(e[2]))]
+            for (a, e) in zip(approx, exact)])
+
+        report.append({
+            'networkType': networkType,
+            'numAgents': numAgents,
+            'timeSpan': timeSpan,
+            'stray_error_max': deviations[:, 0].max(),
+            'stray_error_final': deviations[-1, 0],
+            'attitude_error_max': deviations[:, 1].max(),
+            'attitude_error_final': deviations[-1, 1],
+            'education_error_max': deviations[:, 2].max(),
+            'education_error_final': deviations[-1, 2],
+            'mean_field_time': meanFieldTime,
+            'stochastic_time': stochasticTime
+        })
+
+    if reportFile is not None and report:
+        with open(reportFile, 'w') as f:
+            writer = csv.DictWriter(f, fieldnames=list(report[0]))
+            writer.writeheader()
+            writer.writerows(report)
+    return report
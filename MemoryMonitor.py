@@ -0,0 +1,205 @@
+"""
+author = Yash Patel and DoWon Kim
+name = MemoryMonitor.py
+description: Contains all the methods pertinent to accounting for the
+memory used by each of the structures of a simulation, and to stopping
+runs cleanly (after a checkpoint) once a soft memory limit is reached
+"""
+
+import os
+import sys
+import csv
+import pickle
+import random
+import numpy as np
+
+# psutil (optional) reads the process memory on any platform; without
+# it, the memory is read from /proc (Linux only)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+#####################################################################
+# Returns the resident memory (bytes) of the current process, or    #
+# None where it cannot be read                                      #
+#####################################################################
+def MemoryMonitor_rss():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+#####################################################################
+# Given the results file of a run and a suffix, returns the path of #
+# the file with that suffix written next to it                      #
+#####################################################################
+def MemoryMonitor_siblingFile(resultsFile, suffix):
+    return "{}_{}".format(os.path.splitext(resultsFile)[0], suffix)
+
+#####################################################################
+# Given a graph G, returns an estimate of the bytes taken by its    #
+# node and adjacency dictionaries                                   #
+#####################################################################
+def MemoryMonitor_graphSize(G):
+    size = sys.getsizeof(G.adj)
+    for node in G.adj:
+        neighbors = G.adj[node]
+        size += sys.getsizeof(neighbors)
+        size += sum(sys.getsizeof(neighbors[neighbor])
+            for neighbor in neighbors)
+    return size
+
+class MemoryMonitor:
+    #################################################################
+    # Given a soft memory limit in bytes (None for no limit),       #
+    # initializes the monitor. Once the process (or, where its      #
+    # memory cannot be read, the accounted structures) goes over    #
+    # the limit, the run is checkpointed and stopped                #
+    #################################################################
+    def __init__(self, softLimit=None):
+        self.softLimit = softLimit
+
+        self.timeline = []
+        self.timelineFile = None
+        self.stopTime = None
+        self.checkpointFile = None
+
+    #################################################################
+    # Given the results file of a run (None for no output) and      #
+    # whether the run is resumed from a checkpoint, starts the      #
+    # memory timeline next to it (appending to it when resuming)    #
+    #################################################################
+    def MemoryMonitor_start(self, resultsFile, resume=False):
+        self.stopTime = None
+        self.timelineFile = None
+        if resultsFile is None:
+            return
+
+        self.timelineFile = MemoryMonitor_siblingFile(resultsFile,
+            "memory.csv")
+        if not resume or not os.path.exists(self.timelineFile):
+            with open(self.timelineFile, 'w') as f:
+                writer = csv.writer(f)
+                writer.writerow(['time', 'structure', 'count', 'bytes'])
+
+    #################################################################
+    # Given the network base of a (single) run, returns the count   #
+    # of items held and bytes taken by each of its structures       #
+    #################################################################
+    def MemoryMonitor_measureNetwork(self, networkBase):
+        agents = networkBase.NetworkBase_getAgents()
+        pool = networkBase.dogs
+
+        sizes = {}
+        sizes['dogs'] = (len(pool), sys.getsizeof(pool.slots) +
+            sys.getsizeof(pool.free) +
+            sum(sys.getsizeof(dog) for dog in pool.slots))
+        sizes['stray_dogs'] = (len(networkBase.stray_dogs),
+            sys.getsizeof(networkBase.stray_dogs))
+        sizes['stray_to_loc'] = (len(networkBase.stray_to_loc),
+            sys.getsizeof(networkBase.stray_to_loc))
+
+        loc_to_stray = networkBase.loc_to_stray
+        sizes['loc_to_stray'] = (
+            sum(len(loc_to_stray[loc]) for loc in loc_to_stray),
+            sys.getsizeof(loc_to_stray) +
+            sum(sys.getsizeof(loc_to_stray[loc]) for loc in loc_to_stray))
+
+        sizes['agent_dogs'] = (sum(len(agent.dogs) for agent in agents),
+            sum(sys.getsizeof(agent.dogs) for agent in agents))
+        sizes['agents'] = (len(agents), sys.getsizeof(networkBase.Agents) +
+            sum(sys.getsizeof(agent) for agent in agents))
+
+        G = networkBase.G
+        sizes['graph'] = (G.number_of_nodes() + G.number_of_edges(),
+            MemoryMonitor_graphSize(G))
+
+        if networkBase.twoHop is not None:
+            sizes['two_hop'] = (networkBase.twoHop.M.nnz,
+                networkBase.twoHop.TwoHopIndex_nbytes())
+        return sizes
+
+    #################################################################
+    # Given the BatchNetwork of a batched run, returns the count of #
+    # items held and bytes taken by each of its structures          #
+    #################################################################
+    def MemoryMonitor_measureBatch(self, batch):
+        dogs = batch.dogs
+        households = [batch.attitude, batch.normal_attitude,
+            batch.education_level, batch.norm_education_level,
+            batch.num_dogs, batch.num_stray_dogs, batch.p_acquire,
+            batch.p_release, batch.p_sterilization]
+
+        sizes = {}
+        sizes['dogs'] = (len(dogs['rep']),
+            sum(dogs[key].nbytes for key in dogs))
+        sizes['households'] = (batch.attitude.size,
+            sum(array.nbytes for array in households))
+        sizes['adjacency'] = (batch.A.nnz, batch.A.data.nbytes +
+            batch.A.indices.nbytes + batch.A.indptr.nbytes)
+        if batch.influence is not batch.A:
+            sizes['two_hop'] = (batch.twoHop.M.nnz,
+                batch.twoHop.TwoHopIndex_nbytes())
+        return sizes
+
+    #################################################################
+    # Given the current time and the sizes of the structures (as    #
+    # measured above), records them along with the process memory   #
+    # in the timeline, appending them to the timeline file at once  #
+    # (one row per structure, plus the total accounted and the      #
+    # process memory) so that it survives the process being killed  #
+    #################################################################
+    def MemoryMonitor_record(self, time, sizes):
+        total = sum(size for (count, size) in sizes.values())
+        rss = MemoryMonitor_rss()
+        self.timeline.append((time, sizes, total, rss))
+        if self.timelineFile is None:
+            return
+
+        with open(self.timelineFile, 'a') as f:
+            writer = csv.writer(f)
+            for structure in sorted(sizes):
+                count, size = sizes[structure]
+                writer.writerow([time, structure, count, size])
+            writer.writerow([time, 'total', '', total])
+            writer.writerow([time, 'process', '',
+                rss if rss is not None else ''])
+
+    #################################################################
+    # Given a function measuring the structures of the run (as      #
+    # above), returns whether memory is over the soft limit: the    #
+    # process memory is used where it can be read, else the         #
+    # accounted size of the structures, measured now                #
+    #################################################################
+    def MemoryMonitor_overLimit(self, measure):
+        if self.softLimit is None:
+            return False
+
+        used = MemoryMonitor_rss()
+        if used is None:
+            used = sum(size for (count, size) in measure().values())
+        return used > self.softLimit
+
+    #################################################################
+    # Given the current time, the state of the run to be saved (the #
+    # network, or BatchNetwork for batched runs), and the results   #
+    # file, pickles the state along with the random module states   #
+    # next to the results, and marks the run as stopped             #
+    #################################################################
+    def MemoryMonitor_checkpoint(self, time, state, resultsFile):
+        self.stopTime = time
+        if resultsFile is None:
+            return
+
+        self.checkpointFile = MemoryMonitor_siblingFile(resultsFile,
+            "checkpoint.pkl")
+        checkpoint = {'time': time, 'state': state,
+            'random': random.getstate(), 'numpy': np.random.get_state()}
+        with open(self.checkpointFile, 'wb') as f:
+            pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
@@ -13,6 +13,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 from operator import itemgetter 
 
+from Dog import DogPool
+from TwoHopIndex import TwoHopIndex, TwoHopIndex_adjacency, \
+    TWO_HOP_BUDGET, TWO_HOP_DEGREE_CAP
+
 try:
     import networkx as nx
 except ImportError:
@@ -28,7 +32,7 @@ class NetworkBase:
         self.networkType = networkType
         self.timeSpan = timeSpan
 
-        self.dogs = []
+        self.dogs = DogPool()
         self.stray_dogs = []
 
         self.num_dogs = 0
@@ -37,26 +41,85 @@ class NetworkBase:
 
         self.dog_education = 0
 
+        # precomputed two-hop social networks (see NetworkBase_setupTwoHop)
+        self.twoHop = None
+
+        # age past which dogs die (see NetworkBase_setLifespan)
+        self.lifespan = None
+
     def NetworkBase_timeStep(self, time): 
+        self.NetworkBase_updateAgents()
+        self.NetworkBase_reproduce()
+        self.NetworkBase_spreadStrays()
+        self.NetworkBase_updateEducation(time)
+        self.NetworkBase_ageDogs()
+
+    #################################################################
+    # The phases of a time step, which a Scheduler may also run at  #
+    # their own intervals (see NetworkBase_getPhases)               #
+    #################################################################
+    def NetworkBase_updateAgents(self, elapsed=1):
+        if self.twoHop is not None:
+            self.NetworkBase_updateSocialMeans()
+
         for agent in self.NetworkBase_getAgents():
-            agent.Agent_updateAgent()
+            agent.Agent_updateAgent(elapsed)
 
+    def NetworkBase_reproduce(self, elapsed=1):
         for dog in self.dogs:
-            dog.Dog_reproduce()
+            dog.Dog_reproduce(elapsed)
 
+    def NetworkBase_spreadStrays(self):
         for stray in self.stray_dogs:
             self.NetworkBase_spreadStray(stray)
-        self.NetworkBase_updateEducation(time)
+
+    def NetworkBase_ageDogs(self, elapsed=1):
+        if self.lifespan is None:
+            return
+        self.NetworkBase_removeDogs([dog for dog in self.dogs 
+            if dog.Dog_getOlder(elapsed) > self.lifespan])
+
+    #################################################################
+    # Returns the phases of a time step by name, each taking the    #
+    # current time and the time elapsed since its last run (both    #
+    # in years)                                                     #
+    #################################################################
+    def NetworkBase_getPhases(self):
+        return {
+            'agents': lambda time, elapsed: 
+                self.NetworkBase_updateAgents(elapsed),
+            'reproduce': lambda time, elapsed: 
+                self.NetworkBase_reproduce(elapsed),
+            'strays': lambda time, elapsed: 
+                self.NetworkBase_spreadStrays(),
+            'education': lambda time, elapsed: 
+                self.NetworkBase_updateEducation(time, elapsed),
+            'aging': lambda time, elapsed: 
+                self.NetworkBase_ageDogs(elapsed)
+        }
 
     def NetworkBase_setupLookup(self):
         for agent in self.Agents:
             self.loc_to_stray[agent] = []
 
-    def NetworkBase_updateEducation(self, time):
+    #################################################################
+    # Given the current time and the time (in years) elapsed since  #
+    # the last campaign, runs the education campaign over the       #
+    # second half of the time span                                  #
+    #################################################################
+    def NetworkBase_updateEducation(self, time, elapsed=1):
         if time < self.timeSpan/2:
             return
-        self.dog_education += 2/self.timeSpan
+        self.dog_education += 2/self.timeSpan * elapsed
         
+    #################################################################
+    # Given a lifespan (in time steps), makes dogs older than it    #
+    # die, freeing their slots in the pool for the dogs born after  #
+    # them. Opt-in: with no lifespan (None) dogs never die          #
+    #################################################################
+    def NetworkBase_setLifespan(self, lifespan):
+        self.lifespan = lifespan
+
     #################################################################
     # Given a graph G, assigns it to be the graph for this network  #
     #################################################################
@@ -98,6 +161,38 @@ class NetworkBase:
     def NetworkBase_getAgents(self):
         return [self.Agents[agent] for agent in self.Agents]
 
+    #################################################################
+    # Given the owner (None for strays), network, and location of a #
+    # new dog, registers a dog from the pool of the network         #
+    #################################################################
+    def NetworkBase_newDog(self, owner, network, loc):
+        dog = self.dogs.DogPool_newDog(owner, network, loc)
+        self.num_dogs += 1
+        return dog
+
+    #################################################################
+    # Given dogs in the network (e.g. those dying of old age in     #
+    # NetworkBase_ageDogs), removes them from their owners (or the  #
+    # stray lookups) and frees their slots in the pool for reuse    #
+    #################################################################
+    def NetworkBase_removeDogs(self, dogs):
+        removeStrays = False
+        for dog in dogs:
+            if dog.owner is not None:
+                dog.owner.dogs.remove(dog)
+                dog.owner.num_dogs -= 1
+            elif dog in self.stray_to_loc:
+                self.loc_to_stray[self.stray_to_loc.pop(dog)].remove(dog)
+                removeStrays = True
+
+            self.dogs.DogPool_freeDog(dog)
+            self.num_dogs -= 1
+
+        # strays are dropped in a single pass over the list
+        if removeStrays:
+            self.stray_dogs = [dog for dog in self.stray_dogs 
+                if dog.is_alive]
+
     def NetworkBase_addStray(self, agentID, dog):
         self.stray_dogs.append(dog)
 
@@ -128,21 +223,63 @@ class NetworkBase:
         return len(self.Agents)
 
     #################################################################
-    # Returns an array of those in the "social network" of a given  #
-    # agent, defined as being those separated by, at most, two      #
-    # degrees in the graph (two connections away)                   #
+    # Returns the population aggregates watched for convergence:    #
+    # the stray count and the mean (normalized) attitude and        #
+    # education level of the agents                                 #
+    #################################################################
+    def NetworkBase_getAggregates(self):
+        agents = self.NetworkBase_getAgents()
+        attitude = np.mean([agent.normal_attitude for agent in agents])
+        education = np.mean([agent.norm_education_level 
+            for agent in agents])
+        return (len(self.stray_dogs), attitude, education)
+
+    #################################################################
+    # Returns an array of the direct neighbors of a given agent. The#
+    # full "social network" of an agent, defined as being those     #
+    # separated by, at most, two degrees in the graph (two          #
+    # connections away), is only used once NetworkBase_setupTwoHop  #
+    # has been called                                               #
     #################################################################
     def NetworkBase_getNeighbors(self, agent):
         agentID = agent.agentID
         return nx.neighbors(self.G, agentID)
 
+    #################################################################
+    # Given a memory budget and degree cap (see TwoHopIndex), makes #
+    # the mean attitude/education seen by agents run over their     #
+    # two-hop social network. The means of all agents are then      #
+    # computed together at the start of each time step              #
+    #################################################################
+    def NetworkBase_setupTwoHop(self, memoryBudget=TWO_HOP_BUDGET,
+        degreeCap=TWO_HOP_DEGREE_CAP):
+        self.twoHop = TwoHopIndex(TwoHopIndex_adjacency(self.G), 
+            memoryBudget, degreeCap)
+        self.NetworkBase_updateSocialMeans()
+
+    def NetworkBase_updateSocialMeans(self):
+        agentIDs = range(0, self.NetworkBase_getNumAgents())
+        attitudes = np.array([self.Agents[agentID].attitude 
+            for agentID in agentIDs])
+        educations = np.array([self.Agents[agentID].education_level 
+            for agentID in agentIDs])
+
+        self.social_attitude = self.twoHop.TwoHopIndex_mean(attitudes)
+        self.social_education = self.twoHop.TwoHopIndex_mean(educations)
+
     def NetworkBase_mean_attitude(self, agent):
+        if self.twoHop is not None:
+            return self.social_attitude[agent.agentID]
+
         neighbors = self.NetworkBase_getNeighbors(agent)
         attitudes = [self.NetworkBase_getAgent(neigh).attitude 
             for neigh in neighbors]
         return np.mean(attitudes)
 
     def NetworkBase_mean_education(self, agent):
+        if self.twoHop is not None:
+            return self.social_education[agent.agentID]
+
         neighbors = self.NetworkBase_getNeighbors(agent)
         educations = [self.NetworkBase_getAgent(neigh).education_level 
             for neigh in neighbors]
@@ -0,0 +1,382 @@
+"""
+author = Yash Patel and DoWon Kim
+name = ResultsSummary.py
+description: Contains all the methods pertinent to summarizing result
+files of (possibly very large) simulation runs per time step, reading
+them in bounded-size chunks and in parallel across the files of a sweep
+"""
+
+import os
+import csv
+import gzip
+import math
+import argparse
+import itertools
+import numpy as np
+from multiprocessing import Pool
+
+# number of rows read from a results file at once
+CHUNK_SIZE = 100000
+
+# relative accuracy of the approximate quantiles
+RELATIVE_ACCURACY = .01
+
+QUANTILES = [.05, .25, .5, .75, .95]
+
+# number of equal-width bins of the education distribution on [0, 1]
+EDUCATION_BINS = 10
+
+# columns of the results files that identify rows rather than values
+KEY_COLUMNS = ['replicate', 'time', 'agentID']
+
+#####################################################################
+# Mergeable sketch of a distribution giving quantiles with bounded  #
+# relative error: values are counted in logarithmically sized       #
+# buckets, so memory grows with the range of the values rather than #
+# with their count                                                  #
+#####################################################################
+class QuantileSketch:
+    def __init__(self, accuracy=RELATIVE_ACCURACY):
+        self.gamma = (1 + accuracy)/(1 - accuracy)
+        self.logGamma = math.log(self.gamma)
+
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    #################################################################
+    # Given an array of values, adds them to the sketch             #
+    #################################################################
+    def QuantileSketch_add(self, values):
+        QuantileSketch_addGroups([self], np.zeros(len(values), dtype=int),
+            values)
+
+    def QuantileSketch_merge(self, other):
+        for (mine, theirs) in [(self.positive, other.positive),
+            (self.negative, other.negative)]:
+            for key in theirs:
+                mine[key] = mine.get(key, 0) + theirs[key]
+        self.zeros += other.zeros
+        self.count += other.count
+
+    #################################################################
+    # Given q on [0, 1], returns the approximate q-th quantile      #
+    #################################################################
+    def QuantileSketch_quantile(self, q):
+        return self.QuantileSketch_quantiles([q])[0]
+
+    #################################################################
+    # Given a list of q on [0, 1], returns the approximate quantiles#
+    # walking the buckets (in order) only once                      #
+    #################################################################
+    def QuantileSketch_quantiles(self, qs):
+        if self.count == 0:
+            return [float("nan")] * len(qs)
+
+        def value(key):
+            return 2 * self.gamma ** key/(self.gamma + 1)
+
+        ordered = [(-value(key), self.negative[key])
+            for key in sorted(self.negative, reverse=True)]
+        ordered.append((0.0, self.zeros))
+        ordered += [(value(key), self.positive[key])
+            for key in sorted(self.positive)]
+
+        quantiles = {}
+        pending = sorted(qs)
+        seen = 0
+        for (val, count) in ordered:
+            seen += count
+            while pending and seen > pending[0] * (self.count - 1):
+                quantiles[pending.pop(0)] = val
+        for q in pending:
+            quantiles[q] = ordered[-1][0]
+        return [quantiles[q] for q in qs]
+
+#####################################################################
+# Given sketches (with the same accuracy), the index of the sketch  #
+# each value goes to, and an array of values, adds every value to   #
+# its sketch in one pass (NaN values are dropped)                   #
+#####################################################################
+def QuantileSketch_addGroups(sketches, groups, values):
+    valid = ~np.isnan(values)
+    groups, values = groups[valid], values[valid]
+    tiny = np.abs(values) < 1e-12
+
+    counts = np.bincount(groups, minlength=len(sketches))
+    zeros = np.bincount(groups[tiny], minlength=len(sketches))
+    for (sketch, count, zero) in zip(sketches, counts.tolist(), 
+        zeros.tolist()):
+        sketch.count += count
+        sketch.zeros += zero
+
+    logGamma = sketches[0].logGamma
+    for (sign, side) in [(1, 'positive'), (-1, 'negative')]:
+        mask = ~tiny & (sign * values > 0)
+        if not mask.any():
+            continue
+        keys = np.ceil(np.log(sign * values[mask])/logGamma).astype(
+            np.int64)
+
+        # (sketch, bucket) pairs are counted through a single integer code
+        low = int(keys.min())
+        span = int(keys.max()) - low + 1
+        codes, pairCounts = np.unique(groups[mask] * span + (keys - low),
+            return_counts=True)
+        for (code, count) in zip(codes.tolist(), pairCounts.tolist()):
+            buckets = getattr(sketches[code // span], side)
+            key = code % span + low
+            buckets[key] = buckets.get(key, 0) + count
+
+#####################################################################
+# Given the path of a results file, yields (column names, chunk)    #
+# pairs with chunks of at most CHUNK_SIZE rows as 2D float arrays.  #
+# Supports the CSV layout written by DogControlSimulation (plain or #
+# gzip compressed) and .npy files of structured arrays (read via    #
+# memory mapping)                                                   #
+#####################################################################
+def ResultsSummary_readChunks(path, chunkSize=CHUNK_SIZE):
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode='r')
+        columns = list(data.dtype.names)
+        for start in range(0, len(data), chunkSize):
+            rows = data[start:start + chunkSize]
+            yield columns, np.column_stack([rows[column].astype(float)
+                for column in columns])
+        return
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt') as f:
+        columns = next(csv.reader([f.readline()]))
+        while True:
+            lines = list(itertools.islice(f, chunkSize))
+            if not lines:
+                break
+            yield columns, np.loadtxt(lines, delimiter=',', ndmin=2)
+
+#####################################################################
+# Given the path of a results file, returns its column names (read  #
+# from the header only)                                             #
+#####################################################################
+def ResultsSummary_readColumns(path):
+    if path.endswith(".npy"):
+        return list(np.load(path, mmap_mode='r').dtype.names)
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt') as f:
+        return next(csv.reader([f.readline()]))
+
+#####################################################################
+# Given the paths of result files and the columns to group by,      #
+# raises a ValueError naming any file lacking one of the columns    #
+#####################################################################
+def ResultsSummary_checkColumns(paths, groupBy):
+    for path in paths:
+        columns = ResultsSummary_readColumns(path)
+        missing = [column for column in groupBy if column not in columns]
+        if missing:
+            raise ValueError("{} has no column(s) {} to group by "
+                "(columns: {})".format(path, ", ".join(missing),
+                ", ".join(columns)))
+
+#####################################################################
+# Given the path of a results file and the columns to group by,     #
+# streams through the file and returns per group, for each value    #
+# column, its count, sum, sum of squares, min, max and quantile     #
+# sketch, along with the histogram of normalized education levels   #
+#####################################################################
+def ResultsSummary_summarizeFile(path, groupBy=('time',),
+    chunkSize=CHUNK_SIZE):
+    summary = {}
+    for (columns, chunk) in ResultsSummary_readChunks(path, chunkSize):
+        groupIndices = [columns.index(column) for column in groupBy]
+        valueColumns = [column for column in columns
+            if column not in KEY_COLUMNS and column not in groupBy]
+
+        groups, inverse = np.unique(chunk[:, groupIndices], axis=0,
+            return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        statsList = []
+        for group in groups:
+            key = tuple(int(val) if val.is_integer() else val
+                for val in group.tolist())
+            if key not in summary:
+                summary[key] = {'columns': {}, 'education':
+                    np.zeros(EDUCATION_BINS, dtype=int)}
+            statsList.append(summary[key])
+
+        # rows sorted by group once, so that every statistic is a single
+        # reduction over contiguous segments (one per group)
+        order = np.argsort(inverse, kind='stable')
+        starts = np.searchsorted(inverse[order], np.arange(len(groups)))
+        for column in valueColumns:
+            values = chunk[:, columns.index(column)]
+            ordered = values[order]
+            valid = ~np.isnan(ordered)
+
+            counts = np.add.reduceat(valid.astype(int), starts)
+            totals = np.add.reduceat(np.where(valid, ordered, 0), starts)
+            squares = np.add.reduceat(np.where(valid, ordered ** 2, 0),
+                starts)
+            lows = np.minimum.reduceat(np.where(valid, ordered, np.inf),
+                starts)
+            highs = np.maximum.reduceat(np.where(valid, ordered, -np.inf),
+                starts)
+
+            sketches = []
+            for (g, stats) in enumerate(statsList):
+                if column not in stats['columns']:
+                    stats['columns'][column] = [0, 0.0, 0.0, np.inf,
+                        -np.inf, QuantileSketch()]
+                acc = stats['columns'][column]
+                acc[0] += int(counts[g])
+                acc[1] += totals[g]
+                acc[2] += squares[g]
+                acc[3] = min(acc[3], lows[g])
+                acc[4] = max(acc[4], highs[g])
+                sketches.append(acc[5])
+            QuantileSketch_addGroups(sketches, inverse, values)
+
+        if 'norm_education_level' in columns:
+            education = chunk[:, columns.index('norm_education_level')]
+            inRange = (education >= 0) & (education <= 1)
+            bins = np.minimum((education[inRange] * EDUCATION_BINS).astype(
+                int), EDUCATION_BINS - 1)
+            histograms = np.zeros((len(groups), EDUCATION_BINS), dtype=int)
+            np.add.at(histograms, (inverse[inRange], bins), 1)
+            for (stats, histogram) in zip(statsList, histograms):
+                stats['education'] += histogram
+    return summary
+
+#####################################################################
+# Given two summaries (as returned above), merges the second into   #
+# the first and returns it                                          #
+#####################################################################
+def ResultsSummary_merge(summary, other):
+    for key in other:
+        if key not in summary:
+            summary[key] = other[key]
+            continue
+
+        stats, theirs = summary[key], other[key]
+        stats['education'] += theirs['education']
+        for column in theirs['columns']:
+            if column not in stats['columns']:
+                stats['columns'][column] = theirs['columns'][column]
+                continue
+            acc, other_acc = stats['columns'][column], \
+                theirs['columns'][column]
+            acc[0] += other_acc[0]
+            acc[1] += other_acc[1]
+            acc[2] += other_acc[2]
+            acc[3] = min(acc[3], other_acc[3])
+            acc[4] = max(acc[4], other_acc[4])
+            acc[5].QuantileSketch_merge(other_acc[5])
+    return summary
+
+#####################################################################
+# Given the paths of the result files of a sweep, the columns to    #
+# group by, and the number of worker processes, summarizes every    #
+# file (in parallel) and returns the merged summary. The columns    #
+# are to be checked beforehand (see ResultsSummary_checkColumns)    #
+#####################################################################
+def ResultsSummary_summarize(paths, groupBy=('time',), numWorkers=None,
+    chunkSize=CHUNK_SIZE):
+    args = [(path, tuple(groupBy), chunkSize) for path in paths]
+    if numWorkers == 1 or len(paths) == 1:
+        summaries = [ResultsSummary_summarizeFile(*arg) for arg in args]
+    else:
+        with Pool(numWorkers) as pool:
+            summaries = pool.starmap(ResultsSummary_summarizeFile, args)
+
+    summary = {}
+    for other in summaries:
+        summary = ResultsSummary_merge(summary, other)
+    return summary
+
+#####################################################################
+# Given a merged summary, the columns it was grouped by, and the    #
+# output file, writes the summary table (one row per group with     #
+# mean, std, min, max and quantiles of each value column) and the   #
+# education distribution table next to it                           #
+#####################################################################
+def ResultsSummary_write(summary, groupBy, outputFile):
+    keys = sorted(summary)
+    valueColumns = []
+    for key in keys:
+        for column in summary[key]['columns']:
+            if column not in valueColumns:
+                valueColumns.append(column)
+
+    statistics = ['mean', 'std', 'min', 'max'] + \
+        ['q{:02d}'.format(int(round(q * 100))) for q in QUANTILES]
+    with open(outputFile, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(groupBy) + ['count'] +
+            ["{}_{}".format(column, statistic)
+            for column in valueColumns for statistic in statistics])
+
+        for key in keys:
+            columns = summary[key]['columns']
+            count = max(acc[0] for acc in columns.values())
+            row = list(key) + [count]
+            for column in valueColumns:
+                if column not in columns:
+                    row += [''] * len(statistics)
+                    continue
+                n, total, squares, low, high, sketch = columns[column]
+                if n == 0:
+                    row += [''] * len(statistics)
+                    continue
+                mean = total/n
+                std = math.sqrt(max(squares/n - mean ** 2, 0))
+                row += [mean, std, low, high] + \
+                    sketch.QuantileSketch_quantiles(QUANTILES)
+            writer.writerow(row)
+
+    edges = np.linspace(0, 1, EDUCATION_BINS + 1)
+    educationFile = "{}_education.csv".format(
+        os.path.splitext(outputFile)[0])
+    with open(educationFile, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(groupBy) + ['bin_low', 'bin_high', 'count'])
+        for key in keys:
+            for (b, count) in enumerate(summary[key]['education']):
+                writer.writerow(list(key) + [edges[b], edges[b + 1],
+                    count])
+
+#####################################################################
+# Given result files (and options) on the command line, summarizes  #
+# them per time step into compact tables                            #
+#####################################################################
+def main():
+    parser = argparse.ArgumentParser(description="Summarizes simulation "
+        "result files per time step")
+    parser.add_argument("results", nargs='+',
+        help="result files (.csv, .csv.gz or .npy) of the sweep")
+    parser.add_argument("-o", "--output", default="summary.csv",
+        help="summary table to write")
+    parser.add_argument("-g", "--group-by", nargs='+', default=['time'],
+        help="columns to group by (default: time)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=CHUNK_SIZE,
+        help="rows read at once from each file")
+    args = parser.parse_args()
+
+    try:
+        ResultsSummary_checkColumns(args.results, args.group_by)
+    except ValueError as e:
+        parser.error(str(e))
+
+    summary = ResultsSummary_summarize(args.results, args.group_by,
+        args.workers, args.chunk_size)
+    ResultsSummary_write(summary, args.group_by, args.output)
+
+    print("Summarized {} file(s) into {}".format(len(args.results),
+        args.output))
+
+if __name__ == "__main__":
+    main()
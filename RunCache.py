@@ -0,0 +1,166 @@
+"""
+author = Yash Patel and DoWon Kim
+name = RunCache.py
+description: Contains all the methods pertinent to caching the results
+of simulation runs on disk, keyed by a hash of their full configuration
+and of the simulation code, so that identical runs are not recomputed
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+
+# modules whose source determines the outcome of a run
+SOURCE_FILES = ['Agent.py', 'AgentFactory.py', 'ASFNetwork.py',
+    'BatchNetwork.py', 'ConvergenceMonitor.py', 'Dog.py',
+    'DogControlSimulation.py', 'ERNetwork.py', 'NetworkBase.py',
+    'Scheduler.py', 'SWNetwork.py', 'TwoHopIndex.py']
+
+#####################################################################
+# Returns a hash of the simulation source code, so that any change  #
+# to the model invalidates the runs cached with older versions      #
+#####################################################################
+def RunCache_codeVersion():
+    sourceDir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in SOURCE_FILES:
+        path = os.path.join(sourceDir, name)
+        if os.path.exists(path):
+            digest.update(name.encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+class RunCache:
+    #################################################################
+    # Given the directory where runs are to be cached and the disk  #
+    # budget (in bytes) of the cache, initializes the cache. Least  #
+    # recently used entries are evicted beyond the budget           #
+    #################################################################
+    def __init__(self, cacheDir, maxBytes=1 << 30):
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self.codeVersion = RunCache_codeVersion()
+
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+
+    #################################################################
+    # Given the configuration of a run (JSON serializable dict),    #
+    # returns its key: a hash of the configuration and code version #
+    #################################################################
+    def RunCache_key(self, config):
+        contents = json.dumps({'config': config,
+            'code': self.codeVersion}, sort_keys=True)
+        return hashlib.sha256(contents.encode()).hexdigest()
+
+    def RunCache_entryDir(self, key):
+        return os.path.join(self.cacheDir, key)
+
+    #################################################################
+    # Given the key of a run and (optionally) the names of result   #
+    # files, returns whether the run is cached with all those files #
+    #################################################################
+    def RunCache_contains(self, key, names=()):
+        if not os.path.exists(
+            os.path.join(self.RunCache_entryDir(key), 'meta.json')):
+            return False
+        if not names:
+            return True
+        stored = self.RunCache_readMeta(key)['files']
+        return all(name in stored for name in names)
+
+    #################################################################
+    # Given the key of a run and a mapping from the names of result #
+    # files to their destination paths, copies the cached files to  #
+    # them and returns the cached aggregates (None on a miss, which #
+    # includes entries lacking any file given a destination)        #
+    #################################################################
+    def RunCache_restore(self, key, destinations):
+        names = [name for name in destinations 
+            if destinations[name] is not None]
+        if not self.RunCache_contains(key, names):
+            return None
+
+        entryDir = self.RunCache_entryDir(key)
+        meta = self.RunCache_readMeta(key)
+        for name in names:
+            shutil.copyfile(os.path.join(entryDir, name),
+                destinations[name])
+
+        meta['last_access'] = time.time()
+        self.RunCache_writeMeta(key, meta)
+        return meta['aggregates']
+
+    #################################################################
+    # Given the key and configuration of a run, a mapping from the  #
+    # names of result files to their paths, and the aggregates of   #
+    # the run, stores them in the cache and evicts entries beyond   #
+    # the disk budget                                               #
+    #################################################################
+    def RunCache_store(self, key, config, files, aggregates):
+        entryDir = self.RunCache_entryDir(key)
+        if os.path.isdir(entryDir):
+            shutil.rmtree(entryDir)
+        os.makedirs(entryDir)
+
+        stored = []
+        for name in files:
+            if files[name] is not None and os.path.exists(files[name]):
+                shutil.copyfile(files[name], os.path.join(entryDir, name))
+                stored.append(name)
+
+        size = sum(os.path.getsize(os.path.join(entryDir, name))
+            for name in stored)
+        meta = {'config': config, 'code': self.codeVersion,
+            'files': stored, 'aggregates': aggregates, 'size': size,
+            'last_access': time.time()}
+        self.RunCache_writeMeta(key, meta)
+
+        self.RunCache_evict()
+
+    def RunCache_readMeta(self, key):
+        with open(os.path.join(self.RunCache_entryDir(key),
+            'meta.json')) as f:
+            return json.load(f)
+
+    def RunCache_writeMeta(self, key, meta):
+        with open(os.path.join(self.RunCache_entryDir(key),
+            'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    #################################################################
+    # Returns the keys of all the runs currently in the cache       #
+    #################################################################
+    def RunCache_keys(self):
+        return [key for key in os.listdir(self.cacheDir)
+            if self.RunCache_contains(key)]
+
+    #################################################################
+    # Removes least recently used entries until the cache fits in   #
+    # its disk budget                                               #
+    #################################################################
+    def RunCache_evict(self):
+        metas = [(key, self.RunCache_readMeta(key))
+            for key in self.RunCache_keys()]
+        metas.sort(key=lambda entry: entry[1]['last_access'])
+
+        total = sum(meta['size'] for (key, meta) in metas)
+        for (key, meta) in metas:
+            if total <= self.maxBytes:
+                break
+            self.RunCache_invalidate(key)
+            total -= meta['size']
+
+    #################################################################
+    # Given the key of a run, removes it from the cache (all runs   #
+    # if no key is given)                                           #
+    #################################################################
+    def RunCache_invalidate(self, key=None):
+        keys = self.RunCache_keys() if key is None else [key]
+        for key in keys:
+            entryDir = self.RunCache_entryDir(key)
+            if os.path.isdir(entryDir):
+                shutil.rmtree(entryDir)
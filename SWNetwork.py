@@ -23,6 +23,20 @@ except ImportError:
     raise ImportError("You must install NetworkX:\
     (http://networkx.lanl.gov/) for SE simulation")
 
+#####################################################################
+# Given a nodeCount, the number of neighbors to which each node is  #
+# connected (k) and the probability of rewiring each edge, returns  #
+# a SW graph (graph only: used as is by batched runs)               #
+#####################################################################
+def SWNetwork_createGraph(nodeCount, k=4, p = 0.0):
+    G = nx.generators.random_graphs.watts_strogatz_graph(
+                n = nodeCount,
+                k = k,
+                p = p,
+                seed = None)
+    G.name = "small_world_graph(%s,%s,%s)"%(nodeCount, k, p)
+    return G
+
 class SWNetwork:
     #################################################################
     # Given a nodeCount for the number of agents to be simulated,   #
@@ -54,13 +68,7 @@ class SWNetwork:
     # Creates the agents present in the simulation (SW graph)       #
     #################################################################
     def SWNetwork_createAgents(self):
-        self.G = nx.generators.random_graphs.watts_strogatz_graph(
-                    n = self.nodeCount,
-                    k = self.k,
-                    p = self.p,
-                    seed = None)
-        self.G.name = "small_world_graph(%s,%s,%s)"%(self.nodeCount, \
-            self.k, self.p)
+        self.G = SWNetwork_createGraph(self.nodeCount, self.k, self.p)
 
         for i in range(0, self.nodeCount):    
             curAgent = self.agentFactory.AgentFactory_createAgent(self, i)
@@ -0,0 +1,85 @@
+"""
+author = Yash Patel and DoWon Kim
+name = Scheduler.py
+description: Contains all the methods pertinent to scheduling the
+phases of the simulation (agent updates, reproduction, stray movement,
+education campaigns and aging) at their own intervals of two-week ticks
+"""
+
+# ticks (2 week spans) in a year, i.e. in a time step of the simulation
+TICKS_PER_YEAR = 26
+
+# ticks between two reproduction phases by default (about the nine
+# weeks of a dog's gestation)
+GESTATION_TICKS = 5
+
+# order in which the phases due at the same tick are run (that of
+# NetworkBase_timeStep)
+PHASES = ['agents', 'reproduce', 'strays', 'education', 'aging']
+
+#####################################################################
+# Given a probability per time step (year) and the time elapsed (in #
+# years), returns the probability over the time elapsed (that of at #
+# least one event at the same hazard), which is exactly p for a     #
+# full time step: works on numpy arrays as well                     #
+#####################################################################
+def Scheduler_hazard(p, elapsed):
+    if elapsed == 1:
+        return p
+    return 1 - (1 - p) ** elapsed
+
+class Scheduler:
+    #################################################################
+    # Given the interval (in ticks) of each phase, initializes the  #
+    # schedule. By default strays move every tick, dogs reproduce   #
+    # every GESTATION_TICKS ticks, and agents update their          #
+    # attitudes and education (and acquire/release dogs), the       #
+    # education campaign runs and dogs age once a year. Each phase  #
+    # is passed the time elapsed since its last run in years, i.e.  #
+    # time steps (see Scheduler_hazard), so that the yearly rates   #
+    # of the model do not depend on the intervals                   #
+    #################################################################
+    def __init__(self, agentInterval=TICKS_PER_YEAR,
+        reproduceInterval=GESTATION_TICKS, strayInterval=1,
+        educationInterval=TICKS_PER_YEAR, agingInterval=TICKS_PER_YEAR):
+        for interval in [agentInterval, reproduceInterval, strayInterval,
+            educationInterval, agingInterval]:
+            if interval != int(interval) or interval <= 0:
+                raise ValueError("Phase intervals must be positive "
+                    "integers (ticks), got {}".format(interval))
+
+        self.intervals = {
+            'agents': agentInterval,
+            'reproduce': reproduceInterval,
+            'strays': strayInterval,
+            'education': educationInterval,
+            'aging': agingInterval
+        }
+
+    #################################################################
+    # Returns the configuration of the scheduler (used to identify  #
+    # runs in the cache)                                            #
+    #################################################################
+    def Scheduler_getConfig(self):
+        return dict(self.intervals)
+
+    #################################################################
+    # Given a tick, returns the names of the phases due at it (all  #
+    # phases are due at tick 0)                                     #
+    #################################################################
+    def Scheduler_due(self, tick):
+        return [phase for phase in PHASES
+            if tick % self.intervals[phase] == 0]
+
+    #################################################################
+    # Given the phases of a network (by name, as returned by        #
+    # NetworkBase_getPhases or BatchNetwork_getPhases) and a year,  #
+    # runs all the ticks of that year, passing each phase the time  #
+    # and its interval (both in years)                              #
+    #################################################################
+    def Scheduler_runYear(self, phases, year):
+        for tick in range(year * TICKS_PER_YEAR,
+            (year + 1) * TICKS_PER_YEAR):
+            for phase in self.Scheduler_due(tick):
+                phases[phase](float(tick)/TICKS_PER_YEAR,
+                    float(self.intervals[phase])/TICKS_PER_YEAR)
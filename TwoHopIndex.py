@@ -0,0 +1,112 @@
+"""
+author = Yash Patel and DoWon Kim
+name = TwoHopIndex.py
+description: Contains all the methods pertinent to the precomputed
+index of the "social network" of each agent, i.e. all those within two
+degrees in the graph, stored as a sparse (CSR) matrix
+"""
+
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+except ImportError:
+    raise ImportError("You must install SciPy:\
+    (http://www.scipy.org/) for the two-hop index")
+
+# default memory budget (bytes) of the index and maximum degree of the
+# agents through which two-hop connections are followed
+TWO_HOP_BUDGET = 256 * 1024 * 1024
+TWO_HOP_DEGREE_CAP = 100
+
+# bytes per stored entry of a CSR matrix (float64 data + int32 index)
+BYTES_PER_ENTRY = 12
+
+#####################################################################
+# Given a graph G whose nodes are the agent IDs 0, ..., N - 1,      #
+# returns its (symmetric) adjacency matrix in CSR form              #
+#####################################################################
+def TwoHopIndex_adjacency(G):
+    rows, cols = [], []
+    for (u, v) in G.edges():
+        rows.append(u)
+        cols.append(v)
+        if u != v:
+            rows.append(v)
+            cols.append(u)
+
+    N = G.number_of_nodes()
+    data = np.ones(len(rows))
+    return sp.coo_matrix((data, (rows, cols)), shape=(N, N)).tocsr()
+
+class TwoHopIndex:
+    #################################################################
+    # Given the adjacency matrix A of the graph, a memory budget in #
+    # bytes, and a degree cap, builds the pattern of A + A^2 (each  #
+    # agent's neighbors and their neighbors, counted once). Paths   #
+    # are not followed through agents of degree above the cap (the  #
+    # hubs of ASF networks), and the cap is lowered further if the  #
+    # index would not fit in the memory budget                      #
+    #################################################################
+    def __init__(self, A, memoryBudget=TWO_HOP_BUDGET,
+        degreeCap=TWO_HOP_DEGREE_CAP):
+        degree = np.diff(A.indptr)
+        self.degreeCap = self.TwoHopIndex_fitCap(A, degree,
+            memoryBudget, degreeCap)
+
+        through = sp.diags((degree <= self.degreeCap).astype(float))
+        M = (A + A.dot(through).dot(A)).tocsr()
+
+        # agents are only part of their own social network through
+        # a self-loop, as with the direct neighbors
+        M = (M - sp.diags(M.diagonal()) + sp.diags(A.diagonal())).tocsr()
+        M.eliminate_zeros()
+        M.data[:] = 1
+
+        self.M = M
+        self.counts = np.diff(M.indptr)
+
+    #################################################################
+    # Returns the largest degree cap (at most the one requested)    #
+    # for which an upper bound on the size of the index fits in the #
+    # memory budget: an agent of degree d adds at most d^2 entries  #
+    #################################################################
+    def TwoHopIndex_fitCap(self, A, degree, memoryBudget, degreeCap):
+        available = memoryBudget/BYTES_PER_ENTRY - A.nnz
+        degrees = np.sort(degree[degree <= degreeCap]).astype(float)
+        if len(degrees) == 0:
+            return 0
+
+        # entries added when following every agent up to each degree
+        candidates = np.unique(degrees)
+        entries = np.cumsum(degrees ** 2)[
+            np.searchsorted(degrees, candidates, side='right') - 1]
+
+        fitting = candidates[entries <= available]
+        if len(fitting) == 0:
+            return 0
+        return int(fitting.max())
+
+    #################################################################
+    # Given an agentID, returns the IDs of those in its social      #
+    # network (within two degrees)                                  #
+    #################################################################
+    def TwoHopIndex_getNeighbors(self, agentID):
+        return self.M.indices[self.M.indptr[agentID]:
+            self.M.indptr[agentID + 1]]
+
+    #################################################################
+    # Given values per agent (shape (N,) or (N, R)), returns their  #
+    # mean over the social network of every agent at once (0 for    #
+    # agents without any)                                           #
+    #################################################################
+    def TwoHopIndex_mean(self, values):
+        totals = self.M.dot(values)
+        counts = np.maximum(self.counts, 1)
+        if totals.ndim > 1:
+            counts = counts[:, None]
+        return totals/counts
+
+    def TwoHopIndex_nbytes(self):
+        return self.M.data.nbytes + self.M.indices.nbytes + \
+            self.M.indptr.nbytes